@@ -1,14 +1,48 @@
+import base64
 import logging
+import sys
 import httpx
 import asyncio
-from typing import List, Dict, Any, Optional
+from array import array
+from typing import List, Dict, Any, Optional, Union
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+VECTOR_ENCODING_HEADER = "X-Vector-Encoding"
+
+def encode_vector(vector: List[float]) -> str:
+    """Base64 little-endian float32, as accepted by the vector service."""
+    packed = array("f", vector)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode("ascii")
+
+def decode_vector(value: Union[str, List[float], None]) -> Optional[List[float]]:
+    if not isinstance(value, str):
+        return value
+    unpacked = array("f")
+    unpacked.frombytes(base64.b64decode(value))
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked.tolist()
+
 class VectorClient:
-    def __init__(self, base_url: str = None):
+    def __init__(self, base_url: str = None, vector_encoding: str = None):
         self.base_url = base_url or settings.VECTOR_SERVICE_URL
+        # "base64" packs vectors as float32 both ways (about 4x smaller than
+        # JSON floats and much cheaper to parse); "json" sends float lists
+        self.vector_encoding = vector_encoding or settings.VECTOR_ENCODING
+
+    @property
+    def _compact(self) -> bool:
+        return self.vector_encoding == "base64"
+
+    def _vector_out(self, vector: List[float]) -> Union[str, List[float]]:
+        return encode_vector(vector) if self._compact else vector
+
+    def _headers(self) -> Dict[str, str]:
+        return {VECTOR_ENCODING_HEADER: "base64"} if self._compact else {}
 
     async def wait_for_service(self, timeout: int = 60) -> bool:
         start_time = asyncio.get_event_loop().time()
@@ -27,18 +61,39 @@ class VectorClient:
     async def embed(self, text: str) -> List[float]:
         async with httpx.AsyncClient(base_url=self.base_url, timeout=60.0) as client:
             try:
-                resp = await client.post("/embed", json={"text": text})
+                resp = await client.post("/embed", json={"text": text}, headers=self._headers())
                 resp.raise_for_status()
-                return resp.json()["embedding"]
+                return decode_vector(resp.json()["embedding"])
             except Exception as e:
                 logger.error(f"Embed failed: {e}")
                 return []
 
+    async def embed_batch(self, texts: List[str], batch_size: int = 256) -> List[Optional[List[float]]]:
+        """
+        Embeds many texts through /embed/batch, `batch_size` per request.
+        Returns one embedding per text, in order; None where embedding failed.
+        """
+        embeddings: List[Optional[List[float]]] = []
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=120.0) as client:
+            for start in range(0, len(texts), batch_size):
+                chunk = texts[start:start + batch_size]
+                try:
+                    resp = await client.post("/embed/batch", json={"texts": chunk}, headers=self._headers())
+                    resp.raise_for_status()
+                    data = resp.json()
+                    for error in data.get("errors", []):
+                        logger.warning(f"Embed failed for '{chunk[error['index']]}': {error['error']}")
+                    embeddings.extend(decode_vector(e) for e in data["embeddings"])
+                except Exception as e:
+                    logger.error(f"Batch embed failed: {e}")
+                    embeddings.extend([None] * len(chunk))
+        return embeddings
+
     async def search(self, vector: List[float], limit: int = 20, score_threshold: float = 0.0) -> List[Dict[str, Any]]:
         async with httpx.AsyncClient(base_url=self.base_url, timeout=30.0) as client:
             try:
                 resp = await client.post("/search", json={
-                    "vector": vector,
+                    "vector": self._vector_out(vector),
                     "limit": limit,
                     "score_threshold": score_threshold
                 })
@@ -48,10 +103,41 @@ class VectorClient:
                 logger.error(f"Search failed: {e}")
                 return []
 
+    async def search_text_batch(self, texts: List[str], limit: int = 20, score_threshold: float = 0.0,
+                                batch_size: int = 256) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Embeds and searches for texts inside the vector service, `batch_size`
+        texts per request, so no vectors cross the wire. Returns one hit
+        list per text, in order; None where the text could not be embedded
+        or the request failed.
+        """
+        results: List[Optional[List[Dict[str, Any]]]] = []
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=120.0) as client:
+            for start in range(0, len(texts), batch_size):
+                chunk = texts[start:start + batch_size]
+                try:
+                    resp = await client.post("/search/text/batch", json={
+                        "texts": chunk,
+                        "limit": limit,
+                        "score_threshold": score_threshold
+                    })
+                    resp.raise_for_status()
+                    data = resp.json()
+                    chunk_results = data["results"]
+                    for error in data.get("errors", []):
+                        logger.warning(f"Embed failed for '{chunk[error['index']]}': {error['error']}")
+                        chunk_results[error["index"]] = None
+                    results.extend(chunk_results)
+                except Exception as e:
+                    logger.error(f"Text search failed: {e}")
+                    results.extend([None] * len(chunk))
+        return results
+
     async def upsert(self, points: List[Dict[str, Any]]) -> bool:
         async with httpx.AsyncClient(base_url=self.base_url, timeout=60.0) as client:
             try:
-                resp = await client.post("/upsert", json={"points": points})
+                body = [{**p, "vector": self._vector_out(p["vector"])} for p in points]
+                resp = await client.post("/upsert", json={"points": body})
                 resp.raise_for_status()
                 return True
             except Exception as e:
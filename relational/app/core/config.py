@@ -3,6 +3,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./data/foodtracker.db"
     VECTOR_SERVICE_URL: str = "http://vector:8000"
+    # How VectorClient sends and receives vectors: "base64" or "json"
+    VECTOR_ENCODING: str = "base64"
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -8,14 +8,12 @@ vector_client = VectorClient()
 async def retrieve_context(menu_items: List[str]) -> List[Dict[str, Any]]:
     logger.info(f"Retrieving context for {len(menu_items)} items.")
     results = []
-    
-    for item in menu_items:
-        embedding = await vector_client.embed(item)
-        if not embedding:
+
+    # One request embeds and searches the whole menu inside the vector service
+    all_hits = await vector_client.search_text_batch(menu_items, limit=3, score_threshold=0.6)
+    for item, search_hits in zip(menu_items, all_hits):
+        if search_hits is None:
             continue
-            
-        search_hits = await vector_client.search(embedding, limit=3, score_threshold=0.6)
-        
         context_list = []
         for hit in search_hits:
             payload = hit.get('payload', {})
@@ -1,6 +1,5 @@
 import logging
 import pandas as pd
-import asyncio
 from sqlalchemy.orm import Session
 from app.relational import models
 from app.clients.vector_client import VectorClient
@@ -61,23 +60,13 @@ async def seed_data(db: Session, vector_client: VectorClient):
         
         logger.info(f"Prepared {len(to_embed)} items for embedding.")
         
-        sem = asyncio.Semaphore(500) 
-        
-        async def process_item(item):
-            async with sem:
-                vec = await vector_client.embed(item['text'])
-                if vec:
-                    return {
-                        "id": item['id'],
-                        "vector": vec,
-                        "payload": item['payload']
-                    }
-                return None
+        embeddings = await vector_client.embed_batch([item['text'] for item in to_embed])
 
-        tasks = [process_item(item) for item in to_embed]
-        results = await asyncio.gather(*tasks)
-        
-        valid_points = [p for p in results if p]
+        valid_points = [
+            {"id": item['id'], "vector": vec, "payload": item['payload']}
+            for item, vec in zip(to_embed, embeddings)
+            if vec
+        ]
         
         if valid_points:
             chunk_size = 500
@@ -1,9 +1,39 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     QDRANT_URL: str = "http://qdrant:6333"
+    # gRPC transport (opt-in); Qdrant listens for it on QDRANT_GRPC_PORT
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    # Seconds per Qdrant request
+    QDRANT_TIMEOUT_S: int = 10
+    # "qdrant" or "memory": answer searches from an in-process NumPy copy of
+    # the foods collection (snapshotted at startup, updated on upsert)
+    SEARCH_BACKEND: str = "qdrant"
+
+    # Collection profile used when creating a collection without one
+    # (see app/services/collection_profiles.py)
+    COLLECTION_PROFILE: str = "default"
+    # Search defaults; /search can override exact and ef per request.
+    # Rescoring and oversampling only apply to quantized collections.
+    SEARCH_EXACT: bool = False
+    SEARCH_HNSW_EF: Optional[int] = None
+    SEARCH_RESCORE: bool = True
+    SEARCH_OVERSAMPLING: float = 2.0
     OLLAMA_BASE_URL: str = "http://host.docker.internal:11434"
     OLLAMA_MODEL: str = "all-minilm:22m"
+    OLLAMA_TIMEOUT_S: float = 60.0
+
+    # Texts per Ollama /api/embed call, and how many of those calls run at once
+    EMBED_BATCH_SIZE: int = 64
+    EMBED_CONCURRENCY: int = 2
+
+    # Embedding cache keyed by (OLLAMA_MODEL, normalized text): an in-process
+    # LRU in front of a SQLite store (EMBED_CACHE_PATH unset = memory only)
+    EMBED_CACHE_ENABLED: bool = True
+    EMBED_CACHE_MAX_ENTRIES: int = 20000
+    EMBED_CACHE_PATH: Optional[str] = "data/embedding_cache.sqlite3"
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
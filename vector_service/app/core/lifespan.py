@@ -1,11 +1,20 @@
 import logging
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
+from app.core.config import settings
+from app.services import store
+from app.services.memory_index import memory_index
+from app.services.embedding_cache import embedding_cache
 
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Vector service startup.")
+    if settings.SEARCH_BACKEND == "memory":
+        # Retried on the first search if Qdrant isn't reachable yet
+        await memory_index.ensure_loaded(store.qdrant_client, store.COLLECTION_NAME)
     yield
+    await store.close()
+    embedding_cache.close()
     logger.info("Vector service shutdown.")
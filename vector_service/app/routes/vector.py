@@ -1,47 +1,159 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+import asyncio
+from fastapi import APIRouter, Header, HTTPException, Response
+from pydantic import BaseModel, BeforeValidator
+from typing import Annotated, List, Dict, Any, Optional
+from app.core.config import settings
 from app.services import vector_service
+from app.services.collection_profiles import CollectionProfile, get_profile
+from app.services.embedding_cache import embedding_cache
+from app.services.vector_codec import BASE64, VECTOR_ENCODING_HEADER, decode_vector, encode_vector, wants_base64
 
 router = APIRouter()
 
+# A float list, or the same vector as base64 little-endian float32
+Vector = Annotated[List[float], BeforeValidator(decode_vector)]
+
 class EmbedRequest(BaseModel):
     text: str
 
+class EmbedBatchRequest(BaseModel):
+    texts: List[str]
+
 class SearchRequest(BaseModel):
-    vector: List[float]
+    vector: Vector
     limit: int = 20
     score_threshold: float = 0.0
+    # Per-request overrides of SEARCH_EXACT / SEARCH_HNSW_EF
+    exact: Optional[bool] = None
+    ef: Optional[int] = None
+
+class SearchBatchRequest(BaseModel):
+    searches: List[SearchRequest]
+
+class SearchTextRequest(BaseModel):
+    text: str
+    limit: int = 20
+    score_threshold: float = 0.0
+    exact: Optional[bool] = None
+    ef: Optional[int] = None
+
+class SearchTextBatchRequest(BaseModel):
+    texts: List[str]
+    limit: int = 20
+    score_threshold: float = 0.0
+    exact: Optional[bool] = None
+    ef: Optional[int] = None
 
 class UpsertRequest(BaseModel):
     points: List[Dict[str, Any]]
 
 @router.post("/embed")
-async def embed(request: EmbedRequest):
+async def embed(request: EmbedRequest, response: Response, x_vector_encoding: Optional[str] = Header(None)):
+    """
+    With `X-Vector-Encoding: base64` the embedding is returned as base64
+    little-endian float32 (echoed in the response header).
+    """
     embedding = await vector_service.generate_embedding(request.text)
+    if wants_base64(x_vector_encoding):
+        response.headers[VECTOR_ENCODING_HEADER] = BASE64
+        return {"embedding": encode_vector(embedding)}
     return {"embedding": embedding}
 
+@router.post("/embed/batch")
+async def embed_batch(request: EmbedBatchRequest, response: Response, x_vector_encoding: Optional[str] = Header(None)):
+    """
+    Embeddings aligned with `texts`; null where embedding failed, with the
+    reason listed in `errors` by input index. Encoded like /embed when
+    `X-Vector-Encoding: base64` is sent.
+    """
+    embeddings, errors = await vector_service.generate_embeddings(request.texts)
+    if wants_base64(x_vector_encoding):
+        response.headers[VECTOR_ENCODING_HEADER] = BASE64
+        embeddings = [encode_vector(e) if e is not None else None for e in embeddings]
+    return {
+        "embeddings": embeddings,
+        "errors": [{"index": i, "error": message} for i, message in sorted(errors.items())]
+    }
+
+@router.get("/embed/cache/stats")
+async def embed_cache_stats():
+    """
+    Embedding cache hit/miss counters and tier sizes.
+    """
+    # Counts the SQLite rows; keep it off the event loop
+    stats = await asyncio.to_thread(embedding_cache.stats)
+    return {"enabled": settings.EMBED_CACHE_ENABLED, **stats}
+
 @router.post("/search")
 async def search(request: SearchRequest):
-    return vector_service.search(request.vector, request.limit, request.score_threshold)
+    return await vector_service.search(request.vector, request.limit, request.score_threshold, request.exact, request.ef)
+
+@router.post("/search/batch")
+async def search_batch(request: SearchBatchRequest):
+    """
+    Runs every search in one Qdrant round trip. Returns one hit list per
+    search, in request order.
+    """
+    return await vector_service.search_batch([s.model_dump() for s in request.searches])
+
+@router.post("/search/text")
+async def search_text(request: SearchTextRequest):
+    """
+    Embeds `text` and searches for it; same hits as /search.
+    """
+    if not request.text.strip():
+        raise HTTPException(status_code=422, detail="text must not be empty")
+    results, errors = await vector_service.search_texts([request.text], request.limit, request.score_threshold, request.exact, request.ef)
+    if errors:
+        raise HTTPException(status_code=502, detail=f"Embedding failed: {errors[0]}")
+    return results[0]
+
+@router.post("/search/text/batch")
+async def search_text_batch(request: SearchTextBatchRequest):
+    """
+    Embeds all `texts` and searches for them in one Qdrant round trip.
+    `results` holds one hit list per text, in order; texts that could not
+    be embedded get an empty list and are listed in `errors` by index.
+    """
+    results, errors = await vector_service.search_texts(request.texts, request.limit, request.score_threshold, request.exact, request.ef)
+    return {
+        "results": results,
+        "errors": [{"index": i, "error": message} for i, message in sorted(errors.items())]
+    }
 
 @router.post("/upsert")
 async def upsert(request: UpsertRequest):
-    count = vector_service.upsert_points(request.points)
+    """
+    Each point's "vector" may be a float list or base64 little-endian float32.
+    """
+    try:
+        points = [{**p, "vector": decode_vector(p["vector"])} for p in request.points]
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid point vector: {e}")
+    count = await vector_service.upsert_points(points)
     return {"success": True, "count": count}
 
 @router.get("/collections/{name}")
 async def get_collection(name: str):
     try:
-        exists = vector_service.check_collection_exists(name)
+        exists = await vector_service.check_collection_exists(name)
         return {"exists": exists}
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Vector DB error: {e}")
 
 @router.put("/collections/{name}")
-async def create_collection(name: str):
+async def create_collection(name: str, profile: Optional[str] = None, custom: Optional[CollectionProfile] = None):
+    """
+    Creates the collection with a CollectionProfile given as the JSON body,
+    else the preset named by the `profile` query parameter, else the
+    COLLECTION_PROFILE preset.
+    """
+    try:
+        selected = custom or (get_profile(profile) if profile else None)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     try:
-        vector_service.create_collection(name)
+        await vector_service.create_collection(name, selected)
         return {"success": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -49,7 +161,7 @@ async def create_collection(name: str):
 @router.get("/collections/{name}/count")
 async def count_collection(name: str):
     try:
-        count = vector_service.count_points(name)
+        count = await vector_service.count_points(name)
         return {"count": count}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
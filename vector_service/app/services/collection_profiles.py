@@ -0,0 +1,67 @@
+from typing import Any, Dict, Literal, Optional
+from pydantic import BaseModel
+from qdrant_client.http import models as qmodels
+
+VECTOR_SIZE = 384
+
+class CollectionProfile(BaseModel):
+    """
+    Storage and index settings for a new collection.
+
+    quantization keeps a compressed copy of every vector in RAM for the
+    HNSW walk ("scalar": int8, ~4x smaller; "binary": 1 bit per dimension,
+    ~32x smaller). Searches rescore the candidates against the original
+    vectors (see SEARCH_RESCORE / SEARCH_OVERSAMPLING), which can then live
+    on disk. None keeps Qdrant's defaults.
+    """
+    quantization: Optional[Literal["scalar", "binary"]] = None
+    # "float16" halves the stored original vectors
+    datatype: Literal["float32", "float16"] = "float32"
+    on_disk_vectors: bool = False
+    on_disk_payload: bool = False
+    hnsw_m: Optional[int] = None
+    hnsw_ef_construct: Optional[int] = None
+
+    def create_kwargs(self, size: int = VECTOR_SIZE) -> Dict[str, Any]:
+        """Keyword arguments for QdrantClient.create_collection."""
+        quantization_config = None
+        if self.quantization == "scalar":
+            quantization_config = qmodels.ScalarQuantization(
+                scalar=qmodels.ScalarQuantizationConfig(type=qmodels.ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        elif self.quantization == "binary":
+            quantization_config = qmodels.BinaryQuantization(
+                binary=qmodels.BinaryQuantizationConfig(always_ram=True)
+            )
+
+        hnsw_config = None
+        if self.hnsw_m is not None or self.hnsw_ef_construct is not None:
+            hnsw_config = qmodels.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+        return {
+            "vectors_config": qmodels.VectorParams(
+                size=size,
+                distance=qmodels.Distance.COSINE,
+                on_disk=self.on_disk_vectors or None,
+                datatype=qmodels.Datatype.FLOAT16 if self.datatype == "float16" else None
+            ),
+            "hnsw_config": hnsw_config,
+            "quantization_config": quantization_config,
+            "on_disk_payload": self.on_disk_payload or None,
+        }
+
+PROFILES: Dict[str, CollectionProfile] = {
+    "default": CollectionProfile(),
+    "float16": CollectionProfile(datatype="float16"),
+    "int8": CollectionProfile(quantization="scalar"),
+    # Quantized vectors in RAM, originals and payloads on disk
+    "int8_on_disk": CollectionProfile(quantization="scalar", on_disk_vectors=True, on_disk_payload=True),
+    "binary": CollectionProfile(quantization="binary", on_disk_vectors=True),
+    "large": CollectionProfile(quantization="scalar", on_disk_vectors=True, on_disk_payload=True, hnsw_m=32, hnsw_ef_construct=256),
+}
+
+def get_profile(name: str) -> CollectionProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown collection profile '{name}'. Choose from: {', '.join(PROFILES)}")
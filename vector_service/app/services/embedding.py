@@ -1,20 +1,122 @@
+import asyncio
+import json
 import logging
 import httpx
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from app.core.config import settings
+from app.services.embedding_cache import embedding_cache
 
 logger = logging.getLogger(__name__)
 
+async def _embed_chunk(client: httpx.AsyncClient, texts: List[str]) -> List[List[float]]:
+    """
+    One call to Ollama's batched /api/embed. Returns one embedding per text, in order.
+    """
+    response = await client.post(
+        f"{settings.OLLAMA_BASE_URL}/api/embed",
+        json={"model": settings.OLLAMA_MODEL, "input": texts},
+        timeout=settings.OLLAMA_TIMEOUT_S
+    )
+    response.raise_for_status()
+    embeddings = response.json()["embeddings"]
+    if len(embeddings) != len(texts):
+        raise ValueError(f"Ollama returned {len(embeddings)} embeddings for {len(texts)} inputs")
+    return embeddings
+
+def _is_per_input_failure(e: Exception) -> bool:
+    """
+    Whether a failed chunk may have been rejected because of one of its
+    texts (a 4xx from Ollama, or fewer embeddings than inputs), so retrying
+    the texts one by one can isolate it. Connection errors, timeouts and
+    5xx fail every text alike.
+    """
+    if isinstance(e, httpx.HTTPStatusError):
+        return 400 <= e.response.status_code < 500
+    return isinstance(e, ValueError) and not isinstance(e, json.JSONDecodeError)
+
+async def get_embeddings(texts: List[str]) -> Tuple[List[Optional[List[float]]], Dict[int, str]]:
+    """
+    Embeds `texts` in chunks of settings.EMBED_BATCH_SIZE, at most
+    settings.EMBED_CONCURRENCY chunks in flight.
+
+    Texts found in the embedding cache are served from it; only misses
+    go to Ollama, and their results are cached. If Ollama rejects a
+    chunk, its texts are retried one by one so a single bad input does not
+    fail its neighbours; if Ollama is unreachable or errors out, the whole
+    chunk fails at once.
+
+    Returns:
+        (embeddings, errors): one embedding per input (None where it failed)
+        and the error message per failed input index.
+    """
+    embeddings: List[Optional[List[float]]] = [None] * len(texts)
+    errors: Dict[int, str] = {}
+
+    pending = []
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            errors[i] = "empty text"
+        else:
+            pending.append(i)
+
+    if settings.EMBED_CACHE_ENABLED and pending:
+        cached = await asyncio.to_thread(embedding_cache.get_many, [texts[i] for i in pending])
+        for i in pending:
+            embeddings[i] = cached.get(texts[i])
+        pending = [i for i in pending if embeddings[i] is None]
+
+    # Exact repeats are embedded once; texts differing in case or spacing
+    # share a vector only through the cache, whose key is normalize()d
+    duplicates: Dict[int, List[int]] = {}
+    first_by_text: Dict[str, int] = {}
+    for i in pending:
+        duplicates.setdefault(first_by_text.setdefault(texts[i], i), []).append(i)
+    pending = list(duplicates)
+
+    size = max(1, settings.EMBED_BATCH_SIZE)
+    chunks = [pending[start:start + size] for start in range(0, len(pending), size)]
+    sem = asyncio.Semaphore(max(1, settings.EMBED_CONCURRENCY))
+
+    async def process_chunk(client: httpx.AsyncClient, indices: List[int]):
+        async with sem:
+            try:
+                vectors = await _embed_chunk(client, [texts[i] for i in indices])
+                for i, vector in zip(indices, vectors):
+                    embeddings[i] = vector
+                return
+            except Exception as e:
+                if len(indices) == 1 or not _is_per_input_failure(e):
+                    logger.error(f"Failed to get embedding from Ollama: {e}")
+                    for i in indices:
+                        errors[i] = str(e)
+                    return
+                logger.warning(f"Embedding chunk of {len(indices)} texts failed ({e}), retrying individually.")
+
+            for i in indices:
+                try:
+                    embeddings[i] = (await _embed_chunk(client, [texts[i]]))[0]
+                except Exception as e:
+                    logger.error(f"Failed to get embedding from Ollama: {e}")
+                    errors[i] = str(e)
+
+    if chunks:
+        async with httpx.AsyncClient() as client:
+            await asyncio.gather(*(process_chunk(client, indices) for indices in chunks))
+
+    for first, indices in duplicates.items():
+        for i in indices[1:]:
+            embeddings[i] = embeddings[first]
+            if first in errors:
+                errors[i] = errors[first]
+
+    if settings.EMBED_CACHE_ENABLED:
+        computed = {texts[i]: embeddings[i] for i in pending if embeddings[i] is not None}
+        await asyncio.to_thread(embedding_cache.put_many, computed)
+
+    if errors:
+        logger.warning(f"Embedded {len(texts) - len(errors)}/{len(texts)} texts, {len(errors)} failed.")
+    return embeddings, errors
+
 async def get_embedding(text: str) -> List[float]:
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{settings.OLLAMA_BASE_URL}/api/embeddings",
-                json={"model": settings.OLLAMA_MODEL, "prompt": text},
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()["embedding"]
-        except Exception as e:
-            logger.error(f"Failed to get embedding from Ollama: {e}")
-            return []
+    embeddings, _ = await get_embeddings([text])
+    return embeddings[0] or []
@@ -0,0 +1,177 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize(text: str) -> str:
+    """
+    Cache key form of a text: NFKC, whitespace collapsed, case folded.
+    The default embedding model (all-minilm) is uncased, so texts differing
+    only in case embed identically anyway.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by (model, normalized text): an in-process LRU of
+    `max_entries` in front of a SQLite table of float32 blobs at `path`
+    (None keeps the memory tier only).
+
+    Rows written for any other model are deleted when the store is opened,
+    so switching OLLAMA_MODEL never serves stale vectors.
+    """
+
+    # SQLite's default limit on host parameters per statement is 999
+    _QUERY_CHUNK = 500
+
+    def __init__(self, model: str, path: Optional[str], max_entries: int):
+        self.model = model
+        self.path = path
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        # Set when the store cannot be opened; the cache then stays memory-only
+        self._disk_failed = False
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits_memory": 0,
+            "hits_disk": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalidated_rows": 0,
+        }
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db is not None or not self.path or self._disk_failed:
+            return self._db
+        db = None
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS embeddings (model TEXT NOT NULL, text TEXT NOT NULL, vector BLOB NOT NULL, PRIMARY KEY (model, text))")
+            removed = db.execute("DELETE FROM embeddings WHERE model != ?", (self.model,)).rowcount
+            db.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Embedding cache store at {self.path} unavailable ({e}), caching in memory only.")
+            self._disk_failed = True
+            if db is not None:
+                db.close()
+            return None
+        if removed:
+            logger.info(f"Embedding model is now '{self.model}'. Dropped {removed} cached embeddings of other models.")
+            self._counters["invalidated_rows"] += removed
+        rows = db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        logger.info(f"Embedding cache opened at {self.path} with {rows} entries.")
+        self._db = db
+        return db
+
+    def get_many(self, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Cached embeddings for `texts`, keyed by the original text. Texts
+        missing from the result are cache misses.
+        """
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            keys: Dict[str, List[str]] = {}
+            for text in texts:
+                keys.setdefault(normalize(text), []).append(text)
+
+            missing = []
+            for key, originals in keys.items():
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(key)
+                    continue
+                self._memory.move_to_end(key)
+                self._counters["hits_memory"] += len(originals)
+                for text in originals:
+                    found[text] = vector.tolist()
+
+            db = self._connect()
+            if db is not None:
+                for start in range(0, len(missing), self._QUERY_CHUNK):
+                    chunk = missing[start:start + self._QUERY_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    try:
+                        rows = db.execute(
+                            f"SELECT text, vector FROM embeddings WHERE model = ? AND text IN ({placeholders})",
+                            (self.model, *chunk)
+                        ).fetchall()
+                    except sqlite3.Error as e:
+                        logger.warning(f"Embedding cache lookup failed, treating {len(chunk)} texts as misses: {e}")
+                        continue
+                    for key, blob in rows:
+                        vector = array("f")
+                        vector.frombytes(blob)
+                        self._remember(key, vector)
+                        self._counters["hits_disk"] += len(keys[key])
+                        for text in keys[key]:
+                            found[text] = vector.tolist()
+
+            self._counters["misses"] += sum(1 for text in texts if text not in found)
+        return found
+
+    def put_many(self, embeddings: Dict[str, List[float]]):
+        """Stores embeddings keyed by their original text."""
+        if not embeddings:
+            return
+        with self._lock:
+            rows = []
+            for text, values in embeddings.items():
+                key = normalize(text)
+                vector = array("f", values)
+                self._remember(key, vector)
+                rows.append((self.model, key, vector.tobytes()))
+            db = self._connect()
+            if db is not None:
+                try:
+                    db.executemany("INSERT OR REPLACE INTO embeddings (model, text, vector) VALUES (?, ?, ?)", rows)
+                    db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to persist {len(rows)} embeddings: {e}")
+            self._counters["stores"] += len(rows)
+
+    def _remember(self, key: str, vector: array):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._counters["hits_memory"] + self._counters["hits_disk"]
+            lookups = hits + self._counters["misses"]
+            db = self._connect()
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "model": self.model,
+                "memory_entries": len(self._memory),
+                "disk_enabled": db is not None,
+                "disk_entries": db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] if db is not None else 0,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+embedding_cache = EmbeddingCache(
+    model=settings.OLLAMA_MODEL,
+    path=settings.EMBED_CACHE_PATH,
+    max_entries=settings.EMBED_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class MemoryIndex:
+    """
+    Exact cosine search over an in-process copy of a Qdrant collection.
+
+    Vectors are held L2-normalized in one contiguous float32 matrix, so a
+    search is a single matrix product plus an argpartition top-k. Scores
+    match Qdrant's cosine scores, and hits scoring below `score_threshold`
+    are dropped the same way.
+
+    The copy is snapshotted from Qdrant with `load` and kept current by
+    `upsert`, which the service calls after each successful Qdrant upsert.
+    """
+
+    _SCROLL_PAGE = 1000
+    # Minimum seconds between load attempts by ensure_loaded after a failure
+    _RETRY_INTERVAL_S = 5.0
+
+    def __init__(self):
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.ids: List[Any] = []
+        self.payloads: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[Any, int] = {}
+        self.ready = False
+        self._lock: Optional[asyncio.Lock] = None
+        self._retry_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def load(self, client, collection_name: str):
+        """
+        Replaces the index with every point in `collection_name`. A missing
+        collection loads as empty (the relational service creates and seeds
+        it after startup; those upserts then fill the index).
+        """
+        async with self._get_lock():
+            await self._load_locked(client, collection_name)
+
+    async def ensure_loaded(self, client, collection_name: str) -> bool:
+        """
+        Loads the index if it is not loaded yet. Returns whether it is ready.
+
+        Concurrent callers share one load, and after a failed load further
+        attempts wait _RETRY_INTERVAL_S, so searches while Qdrant is down do
+        not each start a full scroll.
+        """
+        if self.ready:
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
+        async with self._get_lock():
+            # Another caller may have loaded, or failed, while we waited
+            if self.ready or time.monotonic() < self._retry_at:
+                return self.ready
+            try:
+                await self._load_locked(client, collection_name)
+            except Exception as e:
+                self._retry_at = time.monotonic() + self._RETRY_INTERVAL_S
+                logger.warning(f"Memory index load failed, retrying in {self._RETRY_INTERVAL_S:.0f}s: {e}")
+        return self.ready
+
+    async def _load_locked(self, client, collection_name: str):
+        ids, payloads, vectors = [], [], []
+        if await client.collection_exists(collection_name):
+            offset = None
+            while True:
+                records, offset = await client.scroll(
+                    collection_name=collection_name,
+                    limit=self._SCROLL_PAGE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                for record in records:
+                    ids.append(record.id)
+                    payloads.append(record.payload)
+                    vectors.append(record.vector)
+                if offset is None:
+                    break
+        self._replace(ids, payloads, vectors)
+        self.ready = True
+        logger.info(f"Memory index loaded {len(ids)} points from '{collection_name}' ({self.matrix.nbytes / 1e6:.1f}MB).")
+
+    def _replace(self, ids: List[Any], payloads: List[Optional[Dict[str, Any]]], vectors: List[List[float]]):
+        if vectors:
+            self.matrix = np.ascontiguousarray(_normalize_rows(np.asarray(vectors, dtype=np.float32)))
+        else:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.ids = ids
+        self.payloads = payloads
+        self._rows = {point_id: row for row, point_id in enumerate(ids)}
+
+    async def upsert(self, points: List[Dict[str, Any]]):
+        """
+        Applies points already written to Qdrant: existing ids are
+        overwritten in place, new ids are appended.
+        """
+        if not points:
+            return
+        async with self._get_lock():
+            if not self.ready:
+                # Not snapshotted yet; the eventual load picks these up from Qdrant
+                return
+            vectors = _normalize_rows(np.asarray([p["vector"] for p in points], dtype=np.float32))
+            new_rows = []
+            for p, vector in zip(points, vectors):
+                row = self._rows.get(p["id"])
+                if row is None:
+                    new_rows.append(vector)
+                    self._rows[p["id"]] = len(self.ids)
+                    self.ids.append(p["id"])
+                    self.payloads.append(p.get("payload"))
+                else:
+                    self.matrix[row] = vector
+                    self.payloads[row] = p.get("payload")
+            if new_rows:
+                appended = np.stack(new_rows)
+                self.matrix = appended if self.matrix.size == 0 else np.concatenate([self.matrix, appended])
+
+    def search_batch(self, searches: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Searches for all vectors with one matrix product. Each search is a
+        dict with "vector", "limit" and "score_threshold"; returns one hit
+        list per search, in order.
+        """
+        if not searches:
+            return []
+        if len(self) == 0:
+            return [[] for _ in searches]
+
+        queries = _normalize_rows(np.asarray([s["vector"] for s in searches], dtype=np.float32))
+        scores = queries @ self.matrix.T
+
+        results = []
+        for s, row_scores in zip(searches, scores):
+            k = min(s["limit"], len(self))
+            if k <= 0:
+                results.append([])
+                continue
+            top = np.argpartition(-row_scores, k - 1)[:k]
+            top = top[np.argsort(-row_scores[top], kind="stable")]
+            results.append([
+                {"id": self.ids[i], "score": float(row_scores[i]), "payload": self.payloads[i]}
+                for i in top
+                if row_scores[i] >= s["score_threshold"]
+            ])
+        return results
+
+    def search(self, vector: List[float], limit: int = 20, score_threshold: float = 0.0) -> List[Dict[str, Any]]:
+        return self.search_batch([{"vector": vector, "limit": limit, "score_threshold": score_threshold}])[0]
+
+memory_index = MemoryIndex()
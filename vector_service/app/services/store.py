@@ -1,21 +1,74 @@
 import logging
-from qdrant_client import QdrantClient
+from typing import Any, Dict, List, Optional
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qmodels
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-qdrant_client = QdrantClient(url=settings.QDRANT_URL)
+# One client (and connection pool) shared by all requests; closed on shutdown
+qdrant_client = AsyncQdrantClient(
+    url=settings.QDRANT_URL,
+    prefer_grpc=settings.QDRANT_PREFER_GRPC,
+    grpc_port=settings.QDRANT_GRPC_PORT,
+    timeout=settings.QDRANT_TIMEOUT_S
+)
 COLLECTION_NAME = "foods"
 
-def search_vectors(embedding: list, limit: int = 20, score_threshold: float = 0.0):
+def search_params(exact: Optional[bool] = None, ef: Optional[int] = None) -> qmodels.SearchParams:
+    """
+    Search parameters from the SEARCH_* settings, with per-request
+    overrides for exact (brute-force) search and the HNSW beam width `ef`.
+    """
+    return qmodels.SearchParams(
+        exact=settings.SEARCH_EXACT if exact is None else exact,
+        hnsw_ef=settings.SEARCH_HNSW_EF if ef is None else ef,
+        quantization=qmodels.QuantizationSearchParams(
+            rescore=settings.SEARCH_RESCORE,
+            oversampling=settings.SEARCH_OVERSAMPLING
+        )
+    )
+
+async def search_vectors(embedding: list, limit: int = 20, score_threshold: float = 0.0,
+                         exact: Optional[bool] = None, ef: Optional[int] = None):
     try:
-        result = qdrant_client.query_points(
+        result = await qdrant_client.query_points(
             collection_name=COLLECTION_NAME,
             query=embedding,
             limit=limit,
-            score_threshold=score_threshold
+            score_threshold=score_threshold,
+            search_params=search_params(exact, ef)
         )
         return result.points
     except Exception as e:
         logger.error(f"Vector search failed: {e}")
         return []
+
+async def search_vectors_batch(searches: List[Dict[str, Any]]):
+    """
+    Runs several searches in one Qdrant request (Query API batch).
+    Each search is a dict with "vector", "limit" and "score_threshold", and
+    optionally "exact" and "ef".
+    Returns one list of points per search, in order.
+    """
+    if not searches:
+        return []
+    requests = [
+        qmodels.QueryRequest(
+            query=s["vector"],
+            limit=s["limit"],
+            score_threshold=s["score_threshold"],
+            params=search_params(s.get("exact"), s.get("ef")),
+            with_payload=True
+        )
+        for s in searches
+    ]
+    try:
+        responses = await qdrant_client.query_batch_points(collection_name=COLLECTION_NAME, requests=requests)
+        return [response.points for response in responses]
+    except Exception as e:
+        logger.error(f"Batch vector search failed: {e}")
+        return [[] for _ in searches]
+
+async def close():
+    await qdrant_client.close()
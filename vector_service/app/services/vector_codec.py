@@ -0,0 +1,38 @@
+import base64
+import sys
+from array import array
+from typing import List, Optional, Union
+
+# Clients send this header with value "base64" to receive vectors in
+# responses as base64-packed little-endian float32 instead of float lists.
+# Vectors in request bodies may use either form; strings are decoded.
+VECTOR_ENCODING_HEADER = "X-Vector-Encoding"
+BASE64 = "base64"
+
+def encode_vector(vector: List[float]) -> str:
+    packed = array("f", vector)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode("ascii")
+
+def decode_vector(value: Union[str, List[float]]) -> List[float]:
+    """
+    Float list of a base64 little-endian float32 vector. Float lists pass
+    through unchanged.
+
+    Raises:
+        ValueError: If the string is not valid base64 of whole float32 values.
+    """
+    if not isinstance(value, str):
+        return value
+    raw = base64.b64decode(value, validate=True)
+    if len(raw) % 4:
+        raise ValueError(f"Encoded vector has {len(raw)} bytes, not a multiple of 4")
+    unpacked = array("f")
+    unpacked.frombytes(raw)
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+def wants_base64(encoding: Optional[str]) -> bool:
+    return (encoding or "").strip().lower() == BASE64
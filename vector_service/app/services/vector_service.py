@@ -1,17 +1,21 @@
 import logging
-from typing import List, Dict, Any
-from app.services.embedding import get_embedding
-from app.services.store import search_vectors, qdrant_client, COLLECTION_NAME
+from typing import List, Dict, Any, Optional, Tuple
+from app.services.collection_profiles import CollectionProfile, get_profile
+from app.services.embedding import get_embedding, get_embeddings
+from app.core.config import settings
+from app.services.memory_index import memory_index
+from app.services.store import search_vectors, search_vectors_batch, qdrant_client, COLLECTION_NAME
 from qdrant_client.http import models as qmodels
-from qdrant_client.http.exceptions import UnexpectedResponse
 
 logger = logging.getLogger(__name__)
 
 async def generate_embedding(text: str) -> List[float]:
     return await get_embedding(text)
 
-def search(vector: List[float], limit: int = 20, score_threshold: float = 0.0) -> List[Dict[str, Any]]:
-    hits = search_vectors(vector, limit, score_threshold)
+async def generate_embeddings(texts: List[str]) -> Tuple[List[Optional[List[float]]], Dict[int, str]]:
+    return await get_embeddings(texts)
+
+def _to_results(hits) -> List[Dict[str, Any]]:
     results = []
     for hit in hits:
         results.append({
@@ -21,7 +25,44 @@ def search(vector: List[float], limit: int = 20, score_threshold: float = 0.0) -
         })
     return results
 
-def upsert_points(points: List[Dict[str, Any]]) -> int:
+async def _use_memory_index() -> bool:
+    # Falls back to Qdrant while the snapshot cannot be loaded
+    return settings.SEARCH_BACKEND == "memory" and await memory_index.ensure_loaded(qdrant_client, COLLECTION_NAME)
+
+async def search(vector: List[float], limit: int = 20, score_threshold: float = 0.0,
+                 exact: Optional[bool] = None, ef: Optional[int] = None) -> List[Dict[str, Any]]:
+    if await _use_memory_index():
+        # Always exact; exact/ef only tune Qdrant's HNSW search
+        return memory_index.search(vector, limit, score_threshold)
+    hits = await search_vectors(vector, limit, score_threshold, exact, ef)
+    return _to_results(hits)
+
+async def search_batch(searches: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    if await _use_memory_index():
+        return memory_index.search_batch(searches)
+    return [_to_results(hits) for hits in await search_vectors_batch(searches)]
+
+async def search_texts(texts: List[str], limit: int = 20, score_threshold: float = 0.0,
+                       exact: Optional[bool] = None, ef: Optional[int] = None) -> Tuple[List[List[Dict[str, Any]]], Dict[int, str]]:
+    """
+    Embeds `texts` and searches for all of them in one batch.
+
+    Returns:
+        (results, errors): one hit list per text (empty where embedding
+        failed) and the embedding error per failed text index.
+    """
+    embeddings, errors = await get_embeddings(texts)
+    embedded = [i for i, e in enumerate(embeddings) if e is not None]
+    hits = await search_batch([
+        {"vector": embeddings[i], "limit": limit, "score_threshold": score_threshold, "exact": exact, "ef": ef}
+        for i in embedded
+    ])
+    results: List[List[Dict[str, Any]]] = [[] for _ in texts]
+    for i, text_hits in zip(embedded, hits):
+        results[i] = text_hits
+    return results, errors
+
+async def upsert_points(points: List[Dict[str, Any]]) -> int:
     q_points = []
     for p in points:
         q_points.append(qmodels.PointStruct(
@@ -30,38 +71,36 @@ def upsert_points(points: List[Dict[str, Any]]) -> int:
             payload=p.get('payload')
         ))
     
-    qdrant_client.upsert(
+    await qdrant_client.upsert(
         collection_name=COLLECTION_NAME,
         points=q_points
     )
+    if settings.SEARCH_BACKEND == "memory":
+        await memory_index.upsert(points)
     return len(q_points)
 
-def check_collection_exists(name: str) -> bool:
+async def check_collection_exists(name: str) -> bool:
     try:
-        qdrant_client.get_collection(name)
-        return True
-    except UnexpectedResponse as e:
-        if e.status_code == 404:
-            return False
-        raise e
+        # Works the same over REST and gRPC (no transport-specific 404 handling)
+        return await qdrant_client.collection_exists(name)
     except Exception as e:
         logger.error(f"Error checking collection: {e}")
         raise e
 
-def create_collection(name: str):
-    qdrant_client.create_collection(
-        collection_name=name,
-        vectors_config=qmodels.VectorParams(size=384, distance=qmodels.Distance.COSINE)
-    )
+async def create_collection(name: str, profile: Optional[CollectionProfile] = None):
+    """
+    Creates `name` with `profile`, or the COLLECTION_PROFILE preset if none is given.
+    """
+    profile = profile or get_profile(settings.COLLECTION_PROFILE)
+    logger.info(f"Creating collection '{name}' with profile {profile.model_dump()}")
+    await qdrant_client.create_collection(collection_name=name, **profile.create_kwargs())
 
-def count_points(collection_name: str = COLLECTION_NAME) -> int:
+async def count_points(collection_name: str = COLLECTION_NAME) -> int:
     try:
-        count_result = qdrant_client.count(collection_name=collection_name)
-        return count_result.count
-    except UnexpectedResponse as e:
-        if e.status_code == 404:
+        if not await qdrant_client.collection_exists(collection_name):
             return 0 # Collection doesn't exist implies 0 points (or logic error in caller)
-        raise e
+        count_result = await qdrant_client.count(collection_name=collection_name)
+        return count_result.count
     except Exception as e:
         logger.error(f"Count failed: {e}")
         raise e
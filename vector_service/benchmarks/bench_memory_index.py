@@ -0,0 +1,144 @@
+"""
+Search latency: Qdrant round trips vs the in-process NumPy index.
+
+Loads the MemoryIndex (SEARCH_BACKEND=memory) from a Qdrant collection and
+times the same random queries through both, one at a time and in batches,
+reporting p50/p95 per query and how often the two agree on the top-k ids.
+Runs directly against Qdrant, so HTTP overhead to the vector service itself
+is not included on either side.
+
+By default it reads the existing `foods` collection. With --synthetic N it
+fills a scratch collection with N random vectors instead and drops it
+afterwards.
+
+Usage (from the vector_service/ directory):
+    python -m benchmarks.bench_memory_index --qdrant-url http://localhost:6333
+    python -m benchmarks.bench_memory_index --qdrant-url http://localhost:6333 --synthetic 7000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qmodels
+
+from app.services.memory_index import MemoryIndex
+
+SCRATCH_COLLECTION = "bench_memory_index"
+
+async def fill_synthetic(client: AsyncQdrantClient, count: int, dim: int, rng: np.random.Generator):
+    if await client.collection_exists(SCRATCH_COLLECTION):
+        await client.delete_collection(SCRATCH_COLLECTION)
+    await client.create_collection(
+        collection_name=SCRATCH_COLLECTION,
+        vectors_config=qmodels.VectorParams(size=dim, distance=qmodels.Distance.COSINE)
+    )
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    for start in range(0, count, 500):
+        await client.upsert(
+            collection_name=SCRATCH_COLLECTION,
+            points=[
+                qmodels.PointStruct(id=i, vector=vectors[i].tolist(), payload={"food_name": f"food {i}"})
+                for i in range(start, min(start + 500, count))
+            ]
+        )
+
+def percentiles(samples: List[float]) -> dict:
+    values = np.array(samples) * 1000
+    return {"p50_ms": round(float(np.median(values)), 3), "p95_ms": round(float(np.percentile(values, 95)), 3)}
+
+async def run(args):
+    rng = np.random.default_rng(0)
+    if args.qdrant_url == ":memory:":
+        client = AsyncQdrantClient(location=":memory:")
+    else:
+        client = AsyncQdrantClient(url=args.qdrant_url, prefer_grpc=args.grpc)
+    collection = args.collection
+    try:
+        if args.synthetic:
+            await fill_synthetic(client, args.synthetic, args.dim, rng)
+            collection = SCRATCH_COLLECTION
+
+        index = MemoryIndex()
+        start = time.perf_counter()
+        await index.load(client, collection)
+        load_s = time.perf_counter() - start
+        if len(index) == 0:
+            raise SystemExit(f"Collection '{collection}' is empty or missing.")
+
+        dim = index.matrix.shape[1]
+        queries = rng.standard_normal((args.queries, dim), dtype=np.float32).tolist()
+        searches = [{"vector": q, "limit": args.limit, "score_threshold": args.score_threshold} for q in queries]
+        batches = [searches[i:i + args.batch_size] for i in range(0, len(searches), args.batch_size)]
+
+        # Warm-up
+        await client.query_points(collection_name=collection, query=queries[0], limit=args.limit)
+        index.search(queries[0], args.limit)
+
+        qdrant_single, qdrant_ids = [], []
+        for s in searches:
+            start = time.perf_counter()
+            result = await client.query_points(
+                collection_name=collection, query=s["vector"], limit=s["limit"], score_threshold=s["score_threshold"]
+            )
+            qdrant_single.append(time.perf_counter() - start)
+            qdrant_ids.append([p.id for p in result.points])
+
+        memory_single, memory_ids = [], []
+        for s in searches:
+            start = time.perf_counter()
+            hits = index.search(s["vector"], s["limit"], s["score_threshold"])
+            memory_single.append(time.perf_counter() - start)
+            memory_ids.append([h["id"] for h in hits])
+
+        qdrant_batch, memory_batch = [], []
+        for batch in batches:
+            requests = [
+                qmodels.QueryRequest(query=s["vector"], limit=s["limit"], score_threshold=s["score_threshold"], with_payload=True)
+                for s in batch
+            ]
+            start = time.perf_counter()
+            await client.query_batch_points(collection_name=collection, requests=requests)
+            qdrant_batch.append((time.perf_counter() - start) / len(batch))
+
+            start = time.perf_counter()
+            index.search_batch(batch)
+            memory_batch.append((time.perf_counter() - start) / len(batch))
+
+        agreement = float(np.mean([a == b for a, b in zip(qdrant_ids, memory_ids)]))
+        rows = [
+            {"backend": "qdrant", "mode": "single", **percentiles(qdrant_single)},
+            {"backend": "memory", "mode": "single", **percentiles(memory_single)},
+            {"backend": "qdrant", "mode": f"batch_{args.batch_size}", **percentiles(qdrant_batch)},
+            {"backend": "memory", "mode": f"batch_{args.batch_size}", **percentiles(memory_batch)},
+        ]
+
+        print(f"{len(index)} points x {dim}d ({index.matrix.nbytes / 1e6:.1f}MB), loaded in {load_s:.2f}s")
+        for row in rows:
+            print(f"{row['backend']:<7} {row['mode']:<10} p50={row['p50_ms']:>8.3f}ms  p95={row['p95_ms']:>8.3f}ms per query")
+        print(f"Top-{args.limit} id agreement: {agreement:.1%}")
+        print(json.dumps({"points": len(index), "dim": dim, "load_s": round(load_s, 3), "agreement": agreement, "results": rows}, indent=2))
+    finally:
+        if args.synthetic and await client.collection_exists(SCRATCH_COLLECTION):
+            await client.delete_collection(SCRATCH_COLLECTION)
+        await client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default="http://localhost:6333", help="Qdrant URL, or :memory: for a local dry run")
+    parser.add_argument("--grpc", action="store_true", help="Talk to Qdrant over gRPC")
+    parser.add_argument("--collection", default="foods")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use a scratch collection of N random vectors")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=3)
+    parser.add_argument("--score-threshold", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
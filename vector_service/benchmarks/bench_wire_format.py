@@ -0,0 +1,87 @@
+"""
+Payload size and encode/decode cost of vectors as JSON floats vs base64 float32.
+
+Builds the bodies that cross the relational <-> vector_service boundary
+(an /upsert chunk as sent by seeding, an /embed/batch response, a
+/search/batch request) once with float lists and once with base64-packed
+little-endian float32 (X-Vector-Encoding: base64), and times
+serializing them to JSON bytes and parsing them back into float lists
+on the receiving side.
+
+Usage (from the vector_service/ directory):
+    python -m benchmarks.bench_wire_format --dim 384 --repeats 20
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from array import array
+
+from app.services.vector_codec import decode_vector, encode_vector
+
+def random_vectors(count: int, dim: int, rng: random.Random) -> list:
+    # Round-tripped through float32 like real embeddings, so JSON prints full-precision decimals
+    return [array("f", [rng.gauss(0.0, 0.05) for _ in range(dim)]).tolist() for _ in range(count)]
+
+def bodies(vectors: list, compact: bool) -> dict:
+    out = encode_vector if compact else (lambda v: v)
+    return {
+        "upsert_500": lambda: {"points": [
+            {"id": i, "vector": out(v), "payload": {"food_name": f"food {i}", "fdc_id": i}}
+            for i, v in enumerate(vectors[:500])
+        ]},
+        "embed_batch_256": lambda: {"embeddings": [out(v) for v in vectors[:256]], "errors": []},
+        "search_batch_64": lambda: {"searches": [
+            {"vector": out(v), "limit": 3, "score_threshold": 0.6} for v in vectors[:64]
+        ]},
+    }
+
+def vectors_of(name: str, body: dict) -> list:
+    if name == "upsert_500":
+        return [p["vector"] for p in body["points"]]
+    if name == "embed_batch_256":
+        return body["embeddings"]
+    return [s["vector"] for s in body["searches"]]
+
+def time_ms(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    vectors = random_vectors(500, args.dim, random.Random(0))
+    rows = []
+    for compact in (False, True):
+        encoding = "base64" if compact else "json"
+        for name, build in bodies(vectors, compact).items():
+            payload = json.dumps(build()).encode()
+
+            def decode():
+                return [decode_vector(v) for v in vectors_of(name, json.loads(payload))]
+
+            rows.append({
+                "body": name,
+                "encoding": encoding,
+                "bytes": len(payload),
+                # Sender: vectors -> body -> JSON bytes
+                "encode_ms": time_ms(lambda: json.dumps(build()).encode(), args.repeats),
+                # Receiver: JSON bytes -> float lists
+                "decode_ms": time_ms(decode, args.repeats),
+            })
+
+    for row in rows:
+        print(f"{row['body']:<16} {row['encoding']:<7} {row['bytes'] / 1024:>9.1f}KB  "
+              f"encode {row['encode_ms']:>8.3f}ms  decode {row['decode_ms']:>8.3f}ms")
+    print(json.dumps(rows, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Concurrent /search throughput against a running vector service.
+
+Fires random 384-d query vectors at increasing concurrency and reports
+requests/sec and latency percentiles per level. With a blocking Qdrant
+client throughput flatlines at the single-request rate; with the async
+client it should keep scaling until Qdrant itself saturates. Compare runs
+with QDRANT_PREFER_GRPC=false and true.
+
+Usage (from the vector_service/ directory):
+    python -m benchmarks.load_search --url http://localhost:8003 --concurrency 1 4 16 64
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import httpx
+
+def random_vector(rng: random.Random, dim: int) -> list:
+    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+
+async def _search(client: httpx.AsyncClient, vector: list, limit: int) -> float:
+    start = time.perf_counter()
+    resp = await client.post("/search", json={"vector": vector, "limit": limit, "score_threshold": 0.0})
+    resp.raise_for_status()
+    return time.perf_counter() - start
+
+async def run(url: str, levels: list, requests_per_level: int, dim: int, limit: int):
+    rng = random.Random(0)
+    vectors = [random_vector(rng, dim) for _ in range(requests_per_level)]
+    rows = []
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=url, timeout=60.0, limits=limits) as client:
+        # Warm-up so connection setup isn't measured
+        await _search(client, vectors[0], limit)
+
+        for concurrency in levels:
+            sem = asyncio.Semaphore(concurrency)
+
+            async def bounded(vector):
+                async with sem:
+                    return await _search(client, vector, limit)
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*[bounded(v) for v in vectors])
+            elapsed = time.perf_counter() - start
+
+            latencies.sort()
+            row = {
+                "concurrency": concurrency,
+                "requests": requests_per_level,
+                "throughput_rps": round(requests_per_level / elapsed, 1),
+                "p50_ms": round(statistics.median(latencies) * 1000, 2),
+                "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 2),
+                "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))] * 1000, 2),
+            }
+            rows.append(row)
+            print(f"c={concurrency:>3}  {row['throughput_rps']:>8.1f} req/s  p50={row['p50_ms']}ms  p95={row['p95_ms']}ms  p99={row['p99_ms']}ms")
+
+    print(json.dumps(rows, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8003")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--limit", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.requests, args.dim, args.limit))
+
+if __name__ == "__main__":
+    main()
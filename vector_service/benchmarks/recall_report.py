@@ -0,0 +1,159 @@
+"""
+Recall vs latency of collection profiles against exact search.
+
+Copies a set of vectors (the live `foods` collection, or a synthetic
+clustered set of --synthetic N vectors) into one scratch collection per
+profile in app/services/collection_profiles.py, waits for Qdrant to build
+the HNSW index, then for each HNSW `ef` (and exact=true) reports recall@k
+against brute-force ground truth computed in NumPy, plus per-query
+p50/p95 latency. Quantized profiles are searched with rescoring at
+--oversampling. Scratch collections are dropped afterwards.
+
+Use it to pick COLLECTION_PROFILE / SEARCH_HNSW_EF as the catalog grows;
+with only a few thousand points the differences are small, so try e.g.
+--synthetic 200000.
+
+Usage (from the vector_service/ directory):
+    python -m benchmarks.recall_report --qdrant-url http://localhost:6333
+    python -m benchmarks.recall_report --synthetic 200000 --profiles default int8 binary --ef 16 64 256
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qmodels
+
+from app.services.collection_profiles import PROFILES
+
+SCRATCH_PREFIX = "recall_report_"
+
+def synthetic_vectors(count: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    # Clustered like real embeddings; uniform noise would make every neighbour equally far
+    centers = rng.standard_normal((max(1, count // 50), dim), dtype=np.float32)
+    assignments = rng.integers(0, len(centers), count)
+    return centers[assignments] + 0.35 * rng.standard_normal((count, dim), dtype=np.float32)
+
+async def source_vectors(client: AsyncQdrantClient, collection: str) -> np.ndarray:
+    vectors, offset = [], None
+    while True:
+        records, offset = await client.scroll(collection_name=collection, limit=1000, offset=offset, with_vectors=True)
+        vectors.extend(record.vector for record in records)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    normalized = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    scores = queries @ normalized.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row.tolist()) for row in top]
+
+async def build_collection(client: AsyncQdrantClient, name: str, profile_name: str, vectors: np.ndarray):
+    if await client.collection_exists(name):
+        await client.delete_collection(name)
+    await client.create_collection(
+        collection_name=name,
+        # Index from the first segment on so small sets are searched through HNSW too
+        optimizers_config=qmodels.OptimizersConfigDiff(indexing_threshold=1),
+        **PROFILES[profile_name].create_kwargs(size=vectors.shape[1])
+    )
+    for start in range(0, len(vectors), 1000):
+        await client.upsert(
+            collection_name=name,
+            points=qmodels.Batch(
+                ids=list(range(start, min(start + 1000, len(vectors)))),
+                vectors=vectors[start:start + 1000].tolist()
+            ),
+            wait=True
+        )
+    while (await client.get_collection(name)).status != qmodels.CollectionStatus.GREEN:
+        await asyncio.sleep(0.5)
+
+async def measure(client: AsyncQdrantClient, name: str, queries: np.ndarray, truth: List[set], k: int,
+                  ef: Optional[int], exact: bool, oversampling: float) -> dict:
+    params = qmodels.SearchParams(
+        hnsw_ef=ef,
+        exact=exact,
+        quantization=qmodels.QuantizationSearchParams(rescore=True, oversampling=oversampling)
+    )
+    latencies, recalls = [], []
+    for query, expected in zip(queries.tolist(), truth):
+        start = time.perf_counter()
+        result = await client.query_points(collection_name=name, query=query, limit=k, search_params=params)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(expected & {p.id for p in result.points}) / k)
+    values = np.array(latencies) * 1000
+    return {
+        "ef": "exact" if exact else ef,
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "p50_ms": round(float(np.median(values)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+    }
+
+async def run(args):
+    rng = np.random.default_rng(0)
+    if args.qdrant_url == ":memory:":
+        client = AsyncQdrantClient(location=":memory:")
+    else:
+        client = AsyncQdrantClient(url=args.qdrant_url, timeout=300)
+    try:
+        vectors = synthetic_vectors(args.synthetic, args.dim, rng) if args.synthetic else await source_vectors(client, args.collection)
+        if len(vectors) < args.k:
+            raise SystemExit("Not enough vectors to report on.")
+
+        # Queries are perturbed copies of stored vectors, like near-duplicate food names
+        sample = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+        queries = sample + args.query_noise * rng.standard_normal(sample.shape, dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        truth = exact_top_k(vectors, queries, args.k)
+        print(f"{len(vectors)} vectors x {vectors.shape[1]}d, {len(queries)} queries, k={args.k}")
+
+        rows = []
+        for profile_name in args.profiles:
+            name = SCRATCH_PREFIX + profile_name
+            start = time.perf_counter()
+            await build_collection(client, name, profile_name, vectors)
+            build_s = time.perf_counter() - start
+            try:
+                for ef in args.ef + [None]:
+                    row = await measure(client, name, queries, truth, args.k, ef, ef is None, args.oversampling)
+                    row = {"profile": profile_name, "build_s": round(build_s, 2), **row}
+                    rows.append(row)
+                    print(f"{profile_name:<14} ef={str(row['ef']):<6} recall@{args.k}={row[f'recall@{args.k}']:.4f}  "
+                          f"p50={row['p50_ms']:>7.3f}ms  p95={row['p95_ms']:>7.3f}ms")
+            finally:
+                await client.delete_collection(name)
+
+        report = {"points": len(vectors), "dim": int(vectors.shape[1]), "queries": len(queries), "k": args.k,
+                  "oversampling": args.oversampling, "results": rows}
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Wrote {args.output}")
+        else:
+            print(json.dumps(report, indent=2))
+    finally:
+        await client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default="http://localhost:6333", help="Qdrant URL, or :memory: for a local dry run")
+    parser.add_argument("--collection", default="foods", help="Source of vectors unless --synthetic is given")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic clustered vectors instead")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of synthetic vectors")
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-noise", type=float, default=0.05)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout only)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.preprocessing import probe_dimensions
+
+logger = logging.getLogger(__name__)
+
+class AdmissionTimeoutError(Exception):
+    """Raised when a request cannot fit in the pixel budget within the wait limit."""
+
+def request_pixels(images: List[bytes]) -> int:
+    """
+    Decoded pixel count of the uploads, read from the image headers without
+    decoding. Images whose header is not recognized count as 0; they fail
+    to decode in preprocessing anyway.
+    """
+    total = 0
+    for image_bytes in images:
+        dims = probe_dimensions(image_bytes)
+        if dims is not None:
+            total += dims[0] * dims[1]
+    return total
+
+class PixelBudget:
+    """
+    Admission control by decoded image size.
+
+    Each in-flight request reserves the pixel count of its uploads; the
+    decoded image, its preprocessed copies and all crops scale with it.
+    Requests that do not fit wait in FIFO order (so a large image is not
+    starved by a stream of small ones) for at most `max_wait_s`, then get
+    AdmissionTimeoutError. A request larger than the whole budget is
+    admitted once nothing else is in flight.
+    """
+
+    def __init__(self, budget_pixels: int, max_wait_s: float):
+        self.budget_pixels = budget_pixels
+        self.max_wait_s = max_wait_s
+        self.in_use = 0
+        self._waiters: deque = deque()
+        self._tickets = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_pixels > 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _fits(self, pixels: int) -> bool:
+        return self.in_use == 0 or self.in_use + pixels <= self.budget_pixels
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self, pixels: int) -> float:
+        """
+        Reserves `pixels`, waiting if needed. Returns the seconds spent waiting.
+
+        Raises:
+            AdmissionTimeoutError: If the reservation did not fit within max_wait_s.
+        """
+        if not self.enabled:
+            return 0.0
+
+        condition = self._get_condition()
+        async with condition:
+            if not self._waiters and self._fits(pixels):
+                self.in_use += pixels
+                return 0.0
+
+            ticket = next(self._tickets)
+            self._waiters.append(ticket)
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    condition.wait_for(lambda: self._waiters[0] == ticket and self._fits(pixels)),
+                    timeout=self.max_wait_s
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Rejected request of {pixels} pixels after waiting {self.max_wait_s}s for the pixel budget.")
+                raise AdmissionTimeoutError(
+                    f"Pixel budget exhausted ({self.in_use}/{self.budget_pixels} pixels in use, "
+                    f"request needs {pixels})"
+                )
+            finally:
+                self._waiters.remove(ticket)
+                # The next waiter may be at the head now
+                condition.notify_all()
+
+            self.in_use += pixels
+            return time.perf_counter() - start
+
+    async def release(self, pixels: int):
+        if not self.enabled:
+            return
+        condition = self._get_condition()
+        async with condition:
+            self.in_use -= pixels
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def reserve(self, pixels: int):
+        """Holds `pixels` of the budget for the duration of the block."""
+        waited = await self.acquire(pixels)
+        try:
+            yield waited
+        finally:
+            await self.release(pixels)
+
+    def gauges(self) -> Dict[str, float]:
+        return {
+            "vision_admission_pixel_budget": self.budget_pixels,
+            "vision_admission_pixels_in_use": self.in_use,
+            "vision_admission_waiting_requests": self.waiting,
+        }
+
+def _budget_pixels() -> int:
+    if settings.ADMISSION_MEMORY_BUDGET_MB <= 0:
+        return 0
+    return int(settings.ADMISSION_MEMORY_BUDGET_MB * 1024 * 1024 / settings.ADMISSION_BYTES_PER_PIXEL)
+
+pixel_budget = PixelBudget(
+    budget_pixels=_budget_pixels(),
+    max_wait_s=settings.ADMISSION_MAX_WAIT_S
+)
@@ -0,0 +1,306 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from app.core.config import settings
+from app.core.models import model_manager
+
+logger = logging.getLogger(__name__)
+
+# dHash grid size; the hash has HASH_SIZE * HASH_SIZE bits
+HASH_SIZE = 16
+# Maximum difference in width/height ratio for two images to count as the same photo
+MAX_ASPECT_DELTA = 0.02
+
+@dataclass
+class CacheKey:
+    sha256: str
+    phash: Optional[np.ndarray]  # packed dHash bits, uint8 (HASH_SIZE * HASH_SIZE / 8,)
+    aspect: float
+    variant: str = ""  # e.g. the extraction mode; entries only match within one variant
+
+    @property
+    def id(self) -> str:
+        """Entry id: the sha, suffixed with the variant if there is one."""
+        return f"{self.sha256}-{self.variant}" if self.variant else self.sha256
+
+def variant_of(entry_id: str) -> str:
+    return entry_id.partition("-")[2]
+
+@dataclass
+class CacheEntry:
+    phash: Optional[np.ndarray]
+    aspect: float
+    items: List[Dict[str, Any]]
+
+def compute_key(image_bytes: bytes, variant: str = "") -> CacheKey:
+    """
+    Builds the cache key for an upload: an exact SHA-256 of the bytes plus a
+    difference hash (dHash) of a reduced grayscale decode. The dHash survives
+    re-encoding and resizing, so near-identical copies of a photo match.
+    """
+    sha = hashlib.sha256(image_bytes).hexdigest()
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    # Reduced decode is much cheaper than a full one for JPEG and plenty for a 16x16 hash
+    img = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None or img.size == 0:
+        return CacheKey(sha256=sha, phash=None, aspect=0.0, variant=variant)
+
+    small = cv2.resize(img, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return CacheKey(sha256=sha, phash=np.packbits(bits.ravel()), aspect=img.shape[1] / float(img.shape[0]), variant=variant)
+
+def find_similar(key: CacheKey, candidates: List[Tuple[str, np.ndarray, float]], max_distance: int) -> Optional[str]:
+    """
+    Returns the id of the closest candidate within `max_distance` hash bits
+    (and a matching aspect ratio), or None. Distances to all candidates are
+    computed in one vectorized XOR/popcount.
+    """
+    candidates = [c for c in candidates if variant_of(c[0]) == key.variant]
+    if key.phash is None or not candidates:
+        return None
+
+    shas = [c[0] for c in candidates]
+    hashes = np.stack([c[1] for c in candidates])
+    aspects = np.array([c[2] for c in candidates], dtype=np.float32)
+
+    distances = np.unpackbits(np.bitwise_xor(hashes, key.phash), axis=1).sum(axis=1)
+    distances[np.abs(aspects - key.aspect) > MAX_ASPECT_DELTA] = max_distance + 1
+
+    best = int(np.argmin(distances))
+    if distances[best] > max_distance:
+        return None
+    return shas[best]
+
+class DiskTier:
+    """
+    On-disk result store, one JSON file per entry, evicted least recently
+    used first once the total size exceeds `max_bytes`. Hash and aspect ratio
+    are encoded in the file name so the index rebuilds from a directory listing.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.directory: Optional[str] = None
+        self._index: Dict[str, Tuple[np.ndarray, float, str]] = {}  # sha -> (phash, aspect, filename)
+        self._total_bytes = 0
+
+    def open(self, namespace: str):
+        """
+        Switches to the directory for `namespace`, deleting entries written
+        under any other model configuration.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        for name in os.listdir(self.root):
+            # Only touch directories that look like namespaces written by this cache
+            if name != namespace and len(name) == len(namespace) and all(c in "0123456789abcdef" for c in name):
+                logger.info(f"Removing stale result cache namespace '{name}'.")
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+        self.directory = os.path.join(self.root, namespace)
+        os.makedirs(self.directory, exist_ok=True)
+        self._index = {}
+        self._total_bytes = 0
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                sha, phash_hex, aspect = filename[:-len(".json")].split("_")
+                phash = np.frombuffer(bytes.fromhex(phash_hex), dtype=np.uint8) if phash_hex else None
+                self._index[sha] = (phash, int(aspect) / 1000.0, filename)
+                self._total_bytes += os.path.getsize(os.path.join(self.directory, filename))
+            except (ValueError, OSError):
+                continue
+        logger.info(f"Result cache disk tier: {len(self._index)} entries, {self._total_bytes} bytes.")
+
+    @property
+    def entries(self) -> int:
+        return len(self._index)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def candidates(self) -> List[Tuple[str, np.ndarray, float]]:
+        return [(sha, phash, aspect) for sha, (phash, aspect, _) in self._index.items() if phash is not None]
+
+    def get(self, sha: str) -> Optional[CacheEntry]:
+        meta = self._index.get(sha)
+        if meta is None:
+            return None
+        path = os.path.join(self.directory, meta[2])
+        try:
+            with open(path) as f:
+                items = json.load(f)
+            os.utime(path)  # mtime doubles as last access time for eviction
+        except (OSError, ValueError):
+            self._index.pop(sha, None)
+            return None
+        return CacheEntry(phash=meta[0], aspect=meta[1], items=items)
+
+    def put(self, sha: str, entry: CacheEntry) -> int:
+        """Writes an entry and returns the number of entries evicted to stay within budget."""
+        phash_hex = entry.phash.tobytes().hex() if entry.phash is not None else ""
+        filename = f"{sha}_{phash_hex}_{int(round(entry.aspect * 1000))}.json"
+        path = os.path.join(self.directory, filename)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry.items, f)
+        os.replace(tmp_path, path)
+
+        if sha not in self._index:
+            self._total_bytes += os.path.getsize(path)
+        self._index[sha] = (entry.phash, entry.aspect, filename)
+        return self._evict()
+
+    def _evict(self) -> int:
+        if self._total_bytes <= self.max_bytes:
+            return 0
+
+        files = []
+        for sha, (_, _, filename) in self._index.items():
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, sha, path))
+            except OSError:
+                continue
+        files.sort()
+
+        evicted = 0
+        for _, size, sha, path in files:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._index.pop(sha, None)
+            self._total_bytes -= size
+            evicted += 1
+        return evicted
+
+class ResultCache:
+    """
+    Two-tier cache of /extract-menu results keyed by image content.
+
+    Lookups try, in order: exact sha in memory, exact sha on disk, then the
+    perceptually closest entry in either tier. Entries are namespaced by the
+    model configuration fingerprint; when it changes both tiers are cleared.
+    """
+
+    def __init__(self, max_entries: int, disk_dir: Optional[str], disk_max_bytes: int, max_distance: int, namespace_fn: Callable[[], str]):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.namespace_fn = namespace_fn
+        self.namespace: Optional[str] = None
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._disk = DiskTier(disk_dir, disk_max_bytes) if disk_dir else None
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits_memory": 0,
+            "hits_disk": 0,
+            "hits_perceptual": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def _check_namespace(self):
+        namespace = self.namespace_fn()
+        if namespace == self.namespace:
+            return
+        if self.namespace is not None:
+            logger.info(f"Model configuration changed ({self.namespace} -> {namespace}). Invalidating result cache.")
+            self._counters["invalidations"] += 1
+        self._memory.clear()
+        if self._disk:
+            self._disk.open(namespace)
+        self.namespace = namespace
+
+    def lookup(self, image_bytes: bytes, variant: str = "") -> Tuple[Optional[List[Dict[str, Any]]], CacheKey]:
+        """
+        Returns (items, key). items is None on a miss; pass the key to store().
+        Results computed differently for the same image (e.g. another
+        extraction mode) are kept apart by `variant`.
+        """
+        key = compute_key(image_bytes, variant)
+        with self._lock:
+            self._check_namespace()
+
+            entry = self._memory.get(key.id)
+            if entry is not None:
+                self._memory.move_to_end(key.id)
+                self._counters["hits_memory"] += 1
+                return entry.items, key
+
+            if self._disk:
+                entry = self._disk.get(key.id)
+                if entry is not None:
+                    self._remember(key.id, entry)
+                    self._counters["hits_disk"] += 1
+                    return entry.items, key
+
+            candidates = [(sha, e.phash, e.aspect) for sha, e in self._memory.items() if e.phash is not None]
+            if self._disk:
+                candidates.extend(c for c in self._disk.candidates() if c[0] not in self._memory)
+            similar = find_similar(key, candidates, self.max_distance)
+            if similar is not None:
+                entry = self._memory.get(similar) or (self._disk.get(similar) if self._disk else None)
+                if entry is not None:
+                    self._remember(similar, entry)
+                    self._counters["hits_perceptual"] += 1
+                    return entry.items, key
+
+            self._counters["misses"] += 1
+            return None, key
+
+    def store(self, key: CacheKey, items: List[Dict[str, Any]]):
+        entry = CacheEntry(phash=key.phash, aspect=key.aspect, items=items)
+        with self._lock:
+            self._check_namespace()
+            self._remember(key.id, entry)
+            if self._disk:
+                try:
+                    self._counters["evictions"] += self._disk.put(key.id, entry)
+                except OSError as e:
+                    logger.warning(f"Failed to write result cache entry: {e}")
+            self._counters["stores"] += 1
+
+    def _remember(self, sha: str, entry: CacheEntry):
+        self._memory[sha] = entry
+        self._memory.move_to_end(sha)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._counters["hits_memory"] + self._counters["hits_disk"] + self._counters["hits_perceptual"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk.entries if self._disk else 0,
+                "disk_bytes": self._disk.total_bytes if self._disk else 0,
+                "namespace": self.namespace,
+            }
+
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    disk_dir=settings.RESULT_CACHE_DIR,
+    disk_max_bytes=settings.RESULT_CACHE_DISK_MAX_BYTES,
+    max_distance=settings.RESULT_CACHE_MAX_HASH_DISTANCE,
+    namespace_fn=model_manager.config_fingerprint
+)
@@ -0,0 +1,111 @@
+from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class Settings(BaseSettings):
+    # "fused": one PaddleOCR instance (det + cls + rec) shared by detection and recognition
+    # "two_stage": separate detector and recognizer instances (legacy)
+    PIPELINE_MODE: str = "fused"
+
+    # Inference backend: "paddle" (Paddle Inference) or "onnx" (ONNX Runtime)
+    INFERENCE_BACKEND: str = "paddle"
+    # ONNX backend: exported models (scripts/export_onnx.py)
+    ONNX_DET_MODEL: str = "/app/models/onnx/det.onnx"
+    ONNX_REC_MODEL: str = "/app/models/onnx/rec.onnx"
+    ONNX_CLS_MODEL: str = "/app/models/onnx/cls.onnx"
+    # Dynamic INT8 weight quantization: "none", "rec" (recognizer only) or "all"
+    ONNX_INT8: str = "none"
+    # Comma-separated ONNX Runtime execution providers, in priority order
+    ONNX_PROVIDERS: str = "CPUExecutionProvider"
+    # 0 = ONNX Runtime default
+    ONNX_INTRA_OP_THREADS: int = 0
+
+    # Preprocessing variant: "clahe" (full-size decode + CLAHE), "pyramid"
+    # (reduced decode sized from estimated text height) or "simplified" (color, no CLAHE)
+    PREPROCESS_MODE: str = "clahe"
+    # Pyramid mode: minimum text height (px) to keep at the working resolution
+    PYRAMID_TARGET_TEXT_HEIGHT: int = 32
+    # Pyramid mode: longest side of the image handed to the detector
+    PYRAMID_DETECT_MAX_SIDE: int = 960
+
+    # Tiled detection for very large/panoramic images: "off", "auto" (only when a
+    # single pass would downsize more than 2x) or "on" (whenever larger than a tile)
+    TILING_MODE: str = "off"
+    # Tile side and overlap in working-image pixels; overlap should exceed the tallest text line
+    TILE_SIZE: int = 960
+    TILE_OVERLAP: int = 128
+    # Parallel tile detectors per process (0 = min(4, CPU count))
+    TILE_WORKERS: int = 0
+    # Boxes from overlapping tiles with IoU above this are duplicates
+    TILE_NMS_IOU: float = 0.5
+
+    # Pre-recognition filter: skip regions that cannot hold readable text
+    REGION_FILTER_ENABLED: bool = True
+    # Minimum region width and height (px)
+    REGION_MIN_SIDE: int = 6
+    # Maximum long/short side ratio (rules, borders)
+    REGION_MAX_ASPECT: float = 80.0
+    # Minimum grayscale standard deviation (blank or uniform patches)
+    REGION_MIN_STD: float = 8.0
+    # Minimum fraction of strong horizontal intensity steps (smooth, stroke-free areas)
+    REGION_MIN_EDGE_DENSITY: float = 0.02
+
+    # Speed/quality tier used when a request does not pick one: "fast"
+    # (morphological text proposals, no angle classification), "balanced"
+    # (DB detector, no angle classification) or "accurate" (det + cls + rec)
+    EXTRACT_MODE: str = "accurate"
+    # Fast tier: longest side of the image the morphological detector works on
+    FAST_DETECT_MAX_SIDE: int = 1280
+
+    # Text recognition: crops per recognizer call (1 = legacy one call per crop)
+    OCR_BATCH_SIZE: int = 16
+
+    # Recognized lines scoring below this are ignored when building menu items
+    # (PaddleOCR's own drop_score default). Requests may ask for a stricter item threshold.
+    MIN_OCR_CONFIDENCE: float = 0.5
+
+    # Streaming: regions recognized between merge steps on /extract-menu/stream
+    STREAM_CHUNK_SIZE: int = 32
+
+    # /extract-menu/batch: maximum images per request
+    BATCH_MAX_IMAGES: int = 8
+
+    # Inference worker pool (0 = run inline on a thread of the API process)
+    INFERENCE_WORKERS: int = 1
+    # Requests allowed to wait for a free worker before new ones are rejected with 503
+    INFERENCE_MAX_QUEUE: int = 8
+    INFERENCE_TIMEOUT_S: float = 120.0
+    # Replace a worker process after this many jobs (0 = never recycle)
+    INFERENCE_MAX_JOBS_PER_WORKER: int = 200
+    INFERENCE_START_METHOD: str = "spawn"
+
+    # Admission control: memory budget for decoded images across in-flight
+    # requests (0 = disabled). Requests reserve width x height x
+    # ADMISSION_BYTES_PER_PIXEL, an estimate of the peak footprint per decoded
+    # pixel (BGR decode, grayscale/CLAHE copies, detector input, crops).
+    ADMISSION_MEMORY_BUDGET_MB: int = 2048
+    ADMISSION_BYTES_PER_PIXEL: float = 12.0
+    # Longest a request waits for budget before it is rejected with 503
+    ADMISSION_MAX_WAIT_S: float = 10.0
+
+    # Startup: run one inference on a synthetic menu before reporting ready
+    WARMUP_ENABLED: bool = True
+    # Longest model loading + warm-up may take before startup is reported as failed
+    STARTUP_TIMEOUT_S: float = 600.0
+
+    # Requests slower than this are logged with their stage timings (0 = disabled)
+    SLOW_REQUEST_THRESHOLD_MS: float = 0.0
+    # Optional JSON-lines file that slow request samples are appended to
+    SLOW_REQUEST_LOG: Optional[str] = None
+
+    # /extract-menu result cache
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 256
+    # On-disk tier is disabled unless a directory is set
+    RESULT_CACHE_DIR: Optional[str] = None
+    RESULT_CACHE_DISK_MAX_BYTES: int = 256 * 1024 * 1024
+    # Max differing bits (of 256) for two uploads to count as the same photo
+    RESULT_CACHE_MAX_HASH_DISTANCE: int = 10
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+settings = Settings()
@@ -0,0 +1,189 @@
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import cv2
+import numpy as np
+from app.core.config import settings
+from app.core.instrumentation import count, stage
+from app.core.layout import Regions, clip_bboxes, layout_detector, polygons_to_bboxes
+from app.core.preprocessing import PreprocessedImage, estimate_text_height
+from app.core.tiling import tiled_detector
+
+logger = logging.getLogger(__name__)
+
+class TextDetector(ABC):
+    """
+    Common interface of the text detectors the pipeline can run.
+
+    `detect` takes the preprocessed image and returns (image, regions):
+    the image recognition crops should be taken from and the detected
+    Regions in its coordinates.
+    """
+    name = "base"
+
+    @abstractmethod
+    def detect(self, prepared: PreprocessedImage, model_manager) -> Tuple[np.ndarray, Regions]:
+        ...
+
+class PaddleTextDetector(TextDetector):
+    """
+    PaddleOCR's DB text detector, with whichever pipeline the model manager
+    was loaded for. Large images are detected tile by tile when tiling is
+    enabled (fused pipeline only).
+    """
+    name = "paddle"
+
+    def detect(self, prepared: PreprocessedImage, model_manager) -> Tuple[np.ndarray, Regions]:
+        if model_manager.fused and tiled_detector.should_tile(prepared.image.shape):
+            # Tiles are cut from the working image; no need for a downsized detector input
+            return tiled_detector.detect(prepared.image, model_manager)
+
+        if model_manager.fused:
+            return self._detect_fused(prepared, model_manager)
+
+        # Layout Extraction (Milestone 2)
+        # Detect text regions using PaddleOCR (Bounding Box Only)
+        with stage("detect"):
+            regions = layout_detector.detect(prepared.detect_image, model_manager)
+        if prepared.detect_scale != 1.0:
+            regions = regions.rescale(prepared.detect_scale, prepared.image.shape)
+        count("regions", len(regions))
+        logger.info(f"Layout Extraction: Detected {len(regions)} text regions")
+        return prepared.image, regions
+
+    def _detect_fused(self, prepared: PreprocessedImage, model_manager) -> Tuple[np.ndarray, Regions]:
+        """
+        Runs the shared engine's text detector on the detector input and
+        converts the polygons to bounding boxes in working-image coordinates
+        in a single NumPy operation. Returns the image as 3-channel BGR.
+        """
+        image, detect_image = prepared.image, prepared.detect_image
+
+        # PaddleOCR predictors expect 3-channel BGR input
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        if detect_image is prepared.image:
+            detect_image = image
+        elif detect_image.ndim == 2:
+            detect_image = cv2.cvtColor(detect_image, cv2.COLOR_GRAY2BGR)
+
+        with stage("detect"):
+            dt_boxes, _ = model_manager.engine.text_detector(detect_image)
+        if dt_boxes is None or len(dt_boxes) == 0:
+            logger.info("PaddleOCR detected no text regions.")
+            count("regions", 0)
+            return image, Regions.empty()
+
+        logger.info(f"PaddleOCR detected {len(dt_boxes)} raw regions.")
+        regions = Regions(polygons_to_bboxes(dt_boxes, image.shape, scale=prepared.detect_scale))
+        count("regions", len(regions))
+        return image, regions
+
+class MorphologyTextDetector(TextDetector):
+    """
+    Model-free text proposals for the fast tier: a morphological gradient
+    picks up stroke edges, Otsu binarizes them, a horizontal closing joins
+    the glyphs of a line and each connected component becomes a region.
+
+    Good enough for the dark-on-light, mostly horizontal text of printed
+    menus at a fraction of the DB detector's cost; curved or rotated text
+    and busy backgrounds are left to the model-based tiers.
+    """
+    name = "morphology"
+
+    # Padding around each component, as a fraction of its height; the
+    # recognizer expects some margin around the glyphs
+    PAD_RATIO = 0.15
+    # Minimum fraction of a component's bbox covered by its pixels
+    MIN_FILL = 0.2
+
+    def __init__(self, max_side: int):
+        self.max_side = max_side
+
+    def detect(self, prepared: PreprocessedImage, model_manager) -> Tuple[np.ndarray, Regions]:
+        with stage("detect"):
+            gray = prepared.detect_image
+            if gray.ndim == 3:
+                gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+
+            scale = prepared.detect_scale
+            long_side = max(gray.shape[:2])
+            if long_side > self.max_side:
+                factor = long_side / float(self.max_side)
+                gray = cv2.resize(
+                    gray,
+                    (int(round(gray.shape[1] / factor)), int(round(gray.shape[0] / factor))),
+                    interpolation=cv2.INTER_AREA
+                )
+                scale *= prepared.detect_image.shape[1] / float(gray.shape[1])
+
+            bboxes = self.propose(gray)
+            bboxes = np.rint(bboxes * scale).astype(np.int32)
+            bboxes = bboxes[clip_bboxes(bboxes, prepared.image.shape)]
+
+        logger.info(f"Morphology detector proposed {len(bboxes)} regions.")
+        count("regions", len(bboxes))
+        return prepared.image, Regions(bboxes)
+
+    def propose(self, gray: np.ndarray) -> np.ndarray:
+        """(N, 4) float32 line boxes [x1, y1, x2, y2] in `gray` coordinates."""
+        # Glyph gaps within a word or between words stay below about one text height
+        text_height = estimate_text_height(gray) or gray.shape[0] / 60.0
+        join_width = max(5, int(round(text_height)))
+
+        gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+        _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        lines = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (join_width, 1)))
+
+        _, _, stats, _ = cv2.connectedComponentsWithStats(lines, connectivity=8)
+        stats = stats[1:]  # drop background
+        x = stats[:, cv2.CC_STAT_LEFT].astype(np.float32)
+        y = stats[:, cv2.CC_STAT_TOP].astype(np.float32)
+        w = stats[:, cv2.CC_STAT_WIDTH].astype(np.float32)
+        h = stats[:, cv2.CC_STAT_HEIGHT].astype(np.float32)
+        fill = stats[:, cv2.CC_STAT_AREA] / np.maximum(w * h, 1)
+
+        keep = (
+            (h >= max(4.0, text_height * 0.5))
+            & (h <= text_height * 4)
+            & (w >= h * 0.5)
+            & (fill >= self.MIN_FILL)
+        )
+        x, y, w, h = x[keep], y[keep], w[keep], h[keep]
+        pad = np.ceil(h * self.PAD_RATIO)
+        return np.stack([x - pad, y - pad, x + w + pad, y + h + pad], axis=1).reshape(-1, 4)
+
+@dataclass(frozen=True)
+class Tier:
+    """
+    One speed/quality tier: the detector to run and whether crops go
+    through angle classification before recognition.
+    """
+    detector: TextDetector
+    classify: bool
+
+paddle_detector = PaddleTextDetector()
+morphology_detector = MorphologyTextDetector(max_side=settings.FAST_DETECT_MAX_SIDE)
+
+# "accurate" is the full det + cls + rec pipeline. "balanced" keeps the DB
+# detector but skips angle classification (menu photos are nearly always
+# upright). "fast" also replaces the detector with morphological proposals.
+TIERS: Dict[str, Tier] = {
+    "fast": Tier(detector=morphology_detector, classify=False),
+    "balanced": Tier(detector=paddle_detector, classify=False),
+    "accurate": Tier(detector=paddle_detector, classify=True),
+}
+
+def get_tier(mode: Optional[str] = None) -> Tier:
+    """
+    Tier for `mode` (defaults to settings.EXTRACT_MODE).
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    mode = mode or settings.EXTRACT_MODE
+    tier = TIERS.get(mode)
+    if tier is None:
+        raise ValueError(f"Unknown extraction mode: {mode}")
+    return tier
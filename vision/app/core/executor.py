@@ -0,0 +1,340 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import sys
+import threading
+from typing import Any, AsyncIterator, Callable, Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+class InferenceTimeoutError(Exception):
+    """Raised when a job does not finish within the configured timeout."""
+
+# Size of the shared buffer a failing worker writes its error to
+_STARTUP_ERROR_BYTES = 1024
+
+def _init_worker(ready_workers, startup_error, warmup: bool):
+    """
+    Runs once in every worker process (including recycled ones).
+    Each worker owns its own ModelManager instance; it loads and warms up
+    its models, then bumps the shared `ready_workers` counter.
+
+    A failure is written to the shared `startup_error` buffer instead of
+    raised: an initializer that raises kills the worker, and the pool
+    would respawn it (and fail again) forever.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+        force=True
+    )
+    from app.core.models import model_manager
+    from app.core.warmup import prepare_models
+    try:
+        prepare_models(model_manager, f"Inference worker {multiprocessing.current_process().pid}", warmup=warmup)
+    except Exception as e:
+        logging.getLogger(__name__).exception("Inference worker failed to load models.")
+        message = (str(e) or type(e).__name__).encode("utf-8", "replace")[:_STARTUP_ERROR_BYTES - 1]
+        with startup_error.get_lock():
+            if not startup_error.value:
+                startup_error.value = message
+        return
+    with ready_workers.get_lock():
+        ready_workers.value += 1
+
+class _StreamEnd:
+    """Marks the end of a streamed job."""
+
+class _StreamError:
+    """Carries an exception raised by a streamed job back to the caller."""
+    def __init__(self, error: BaseException):
+        self.error = error
+
+def _run_streaming(fn: Callable, channel, stream_id: int, *args):
+    """
+    Runs a generator job on a worker, forwarding every yielded value to
+    `channel` as (stream_id, value), followed by an end (or error) marker.
+    """
+    try:
+        for message in fn(*args):
+            channel.put((stream_id, message))
+    except Exception as e:
+        channel.put((stream_id, _StreamError(e)))
+    finally:
+        channel.put((stream_id, _StreamEnd()))
+
+class _DirectChannel:
+    """Inline-mode channel: hands streamed values straight to the executor."""
+    def __init__(self, executor: "InferenceExecutor"):
+        self.executor = executor
+
+    def put(self, item):
+        self.executor._deliver(*item)
+
+class InferenceExecutor:
+    """
+    Dispatches CPU-bound inference jobs off the event loop.
+
+    With workers > 0 jobs run in a pool of processes, each holding its own
+    models; workers are replaced after `max_jobs_per_worker` jobs to bound
+    memory growth. With workers == 0 jobs run on a thread of the current
+    process, which must have loaded the models itself.
+
+    At most `workers + max_queue` jobs are admitted at once; beyond that
+    `submit` raises QueueFullError immediately instead of queueing unbounded.
+    """
+
+    def __init__(self, workers: int, max_queue: int, timeout: float, max_jobs_per_worker: int, start_method: str, warmup: bool = True):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.start_method = start_method
+        self.warmup = warmup
+        self._pool = None
+        self._ready_workers = None
+        self._startup_error = None
+        self._manager = None
+        self._channel = None
+        self._dispatcher = None
+        self._in_flight = 0
+        # Open streams by id: (event loop, asyncio.Queue of streamed values)
+        self._streams = {}
+        self._stream_ids = itertools.count()
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.workers) + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.workers > 0
+
+    @property
+    def ready_workers(self) -> int:
+        """Worker processes that finished loading and warming up (recycled ones included)."""
+        return self._ready_workers.value if self._ready_workers is not None else 0
+
+    @property
+    def startup_error(self) -> Optional[str]:
+        """The first model loading error reported by a worker process, if any."""
+        if self._startup_error is None or not self._startup_error.value:
+            return None
+        return self._startup_error.value.decode("utf-8", "replace")
+
+    def start(self):
+        if not self.uses_processes or self._pool is not None:
+            return
+        logger.info(f"Starting {self.workers} inference worker(s) ({self.start_method}).")
+        ctx = multiprocessing.get_context(self.start_method)
+        self._ready_workers = ctx.Value("i", 0)
+        self._startup_error = ctx.Array("c", _STARTUP_ERROR_BYTES)
+        self._pool = ctx.Pool(
+            processes=self.workers,
+            initializer=_init_worker,
+            initargs=(self._ready_workers, self._startup_error, self.warmup),
+            maxtasksperchild=self.max_jobs_per_worker or None
+        )
+        # Streamed values from all workers share one manager queue, which a
+        # single thread drains into the per-stream asyncio queues
+        self._manager = ctx.Manager()
+        self._channel = self._manager.Queue()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="stream-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def shutdown(self):
+        if self._pool is not None:
+            logger.info("Stopping inference workers.")
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        if self._manager is not None:
+            self._channel.put(None)
+            self._dispatcher.join(timeout=5)
+            self._manager.shutdown()
+            self._manager = None
+            self._channel = None
+            self._dispatcher = None
+
+    def is_running(self) -> bool:
+        return not self.uses_processes or self._pool is not None
+
+    def is_ready(self) -> bool:
+        """
+        True once every initial worker has loaded and warmed up its models.
+        Only meaningful in process mode.
+        """
+        return self._pool is not None and self.ready_workers >= self.workers
+
+    def _admit(self, on_done: Optional[Callable[[], Any]]):
+        if self._in_flight >= self.capacity:
+            if on_done is not None:
+                on_done()
+            raise QueueFullError(f"Inference queue full ({self._in_flight} jobs in flight)")
+        self._in_flight += 1
+
+    def _track(self, job: asyncio.Future, on_done: Optional[Callable[[], Any]]):
+        """
+        Holds the admitted slot until `job` really finishes, even if the
+        caller stopped waiting for it (timeout, disconnect): the worker is
+        busy and the image is in memory until then.
+        """
+        def finished(done: asyncio.Future):
+            self._in_flight -= 1
+            if not done.cancelled():
+                # Marks a result nobody awaits anymore as retrieved
+                done.exception()
+            if on_done is not None:
+                on_done()
+        job.add_done_callback(finished)
+
+    def _start_job(self, fn: Callable, *args) -> asyncio.Future:
+        if self.uses_processes:
+            return self._submit_to_pool(fn, *args)
+        return asyncio.ensure_future(run_in_threadpool(fn, *args))
+
+    async def submit(self, fn: Callable, *args, on_done: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Runs fn(*args) on a worker and awaits its result.
+
+        `on_done` is called once the job has finished on the worker (or
+        right away if it was not admitted), which may be after this
+        coroutine gave up on it.
+
+        Raises:
+            QueueFullError: If the executor is at capacity.
+            InferenceTimeoutError: If the job exceeds the timeout.
+        """
+        self._admit(on_done)
+        try:
+            job = self._start_job(fn, *args)
+        except BaseException:
+            self._in_flight -= 1
+            if on_done is not None:
+                on_done()
+            raise
+        self._track(job, on_done)
+
+        try:
+            # Shielded: the worker keeps running the job to completion; only the caller gives up
+            return await asyncio.wait_for(asyncio.shield(job), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise InferenceTimeoutError(f"Inference exceeded {self.timeout}s")
+
+    async def stream(self, fn: Callable, *args, on_done: Optional[Callable[[], Any]] = None) -> AsyncIterator[Any]:
+        """
+        Runs the generator function fn(*args) on a worker and yields each
+        value as soon as the worker produces it. Admission, the timeout
+        (for the whole stream) and `on_done` work as in `submit`.
+
+        Raises:
+            QueueFullError: If the executor is at capacity (on first iteration).
+            InferenceTimeoutError: If the stream exceeds the timeout.
+        """
+        self._admit(on_done)
+        loop = asyncio.get_running_loop()
+        messages: asyncio.Queue = asyncio.Queue()
+        stream_id = next(self._stream_ids)
+        self._streams[stream_id] = (loop, messages)
+        try:
+            try:
+                channel = self._channel if self.uses_processes else _DirectChannel(self)
+                job = self._start_job(_run_streaming, fn, channel, stream_id, *args)
+            except BaseException:
+                self._in_flight -= 1
+                if on_done is not None:
+                    on_done()
+                raise
+            self._track(job, on_done)
+
+            def job_failed(done: asyncio.Future):
+                # A job that died outside _run_streaming never sends its end marker
+                if not done.cancelled() and done.exception() is not None:
+                    messages.put_nowait(_StreamError(done.exception()))
+            job.add_done_callback(job_failed)
+
+            deadline = loop.time() + self.timeout
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise InferenceTimeoutError(f"Inference exceeded {self.timeout}s")
+                try:
+                    message = await asyncio.wait_for(messages.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    raise InferenceTimeoutError(f"Inference exceeded {self.timeout}s")
+
+                if isinstance(message, _StreamEnd):
+                    break
+                if isinstance(message, _StreamError):
+                    raise message.error
+                yield message
+        finally:
+            # Values still arriving for a closed stream are dropped
+            self._streams.pop(stream_id, None)
+
+    def _deliver(self, stream_id: int, message: Any):
+        """Thread-safe: queues a streamed value for its stream, if still open."""
+        entry = self._streams.get(stream_id)
+        if entry is not None:
+            loop, messages = entry
+            try:
+                loop.call_soon_threadsafe(messages.put_nowait, message)
+            except RuntimeError:
+                # Event loop already closed
+                pass
+
+    def _dispatch(self):
+        channel = self._channel
+        while True:
+            try:
+                item = channel.get()
+            except (EOFError, OSError):
+                # Manager went away (shutdown)
+                return
+            if item is None:
+                return
+            self._deliver(*item)
+
+    def _submit_to_pool(self, fn: Callable, *args) -> asyncio.Future:
+        if self._pool is None:
+            raise RuntimeError("Inference worker pool not started.")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def _resolve(result: Any, error: Optional[BaseException] = None):
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        # Pool callbacks fire on the pool's result-handler thread
+        self._pool.apply_async(
+            fn,
+            args,
+            callback=lambda result: loop.call_soon_threadsafe(_resolve, result),
+            error_callback=lambda error: loop.call_soon_threadsafe(_resolve, None, error)
+        )
+        return future
+
+inference_executor = InferenceExecutor(
+    workers=settings.INFERENCE_WORKERS,
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    timeout=settings.INFERENCE_TIMEOUT_S,
+    max_jobs_per_worker=settings.INFERENCE_MAX_JOBS_PER_WORKER,
+    start_method=settings.INFERENCE_START_METHOD,
+    warmup=settings.WARMUP_ENABLED
+)
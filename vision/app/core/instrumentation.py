@@ -0,0 +1,222 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+REGION_BUCKETS = (0, 10, 25, 50, 100, 200, 400, 800, 1600)
+
+class Trace:
+    """
+    Per-request stage timings (seconds, monotonic clock) and counters
+    (regions, pixels, ...). Repeated stages accumulate, e.g. one
+    "recognize" entry covers every recognizer batch.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def count(self, name: str, value: int):
+        self.counts[name] = self.counts.get(name, 0) + int(value)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def merge(self, data: Dict[str, Any]):
+        """Adds the stages and counts of a trace serialized with to_dict()."""
+        for name, seconds in data.get("stages", {}).items():
+            self.add(name, seconds)
+        for name, value in data.get("counts", {}).items():
+            self.count(name, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"stages": dict(self.stages), "counts": dict(self.counts)}
+
+# Trace of the job running in the current thread/task, if any
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("vision_trace", default=None)
+
+@contextmanager
+def tracing() -> Iterator[Trace]:
+    """
+    Makes a new Trace current for the enclosed pipeline code, so stage()
+    and count() calls anywhere below record into it.
+    """
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+@contextmanager
+def stage(name: str):
+    """Times the enclosed block into the current trace (no-op without one)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - start)
+
+def count(name: str, value: int):
+    """Adds to a counter of the current trace (no-op without one)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.count(name, value)
+
+def server_timing(trace: Trace, total: float) -> str:
+    """
+    Formats a trace as a Server-Timing header value: one `name;dur=ms`
+    entry per stage, the total, and counters as `name;desc=value`.
+    """
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in trace.stages.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    parts.extend(f'{name};desc="{value}"' for name, value in trace.counts.items())
+    return ", ".join(parts)
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def render(self, name: str, labels: str) -> List[str]:
+        sep = "," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+class Metrics:
+    """
+    In-process aggregation of request traces, rendered in the Prometheus
+    text exposition format. Worker processes send their traces back with
+    each result, so the API process sees every request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[str, Histogram] = {}
+        self._stages: Dict[str, Histogram] = {}
+        self._regions = Histogram(REGION_BUCKETS)
+        self._responses: Dict[Tuple[str, int], int] = {}
+        self._pixels = 0
+
+    def observe(self, endpoint: str, status: int, total: float, trace: Optional[Trace]):
+        with self._lock:
+            self._requests.setdefault(endpoint, Histogram(SECONDS_BUCKETS)).observe(total)
+            self._responses[(endpoint, status)] = self._responses.get((endpoint, status), 0) + 1
+            if trace is None:
+                return
+            for name, seconds in trace.stages.items():
+                self._stages.setdefault(name, Histogram(SECONDS_BUCKETS)).observe(seconds)
+            if "regions" in trace.counts:
+                self._regions.observe(trace.counts["regions"])
+            self._pixels += trace.counts.get("pixels", 0)
+
+    def render(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        with self._lock:
+            lines = [
+                "# HELP vision_request_duration_seconds End-to-end request latency.",
+                "# TYPE vision_request_duration_seconds histogram",
+            ]
+            for endpoint, histogram in sorted(self._requests.items()):
+                lines.extend(histogram.render("vision_request_duration_seconds", f'endpoint="{endpoint}"'))
+
+            lines += [
+                "# HELP vision_stage_duration_seconds Time spent per pipeline stage.",
+                "# TYPE vision_stage_duration_seconds histogram",
+            ]
+            for name, histogram in sorted(self._stages.items()):
+                lines.extend(histogram.render("vision_stage_duration_seconds", f'stage="{name}"'))
+
+            lines += [
+                "# HELP vision_regions Text regions detected per image.",
+                "# TYPE vision_regions histogram",
+            ]
+            lines.extend(self._regions.render("vision_regions", ""))
+
+            lines += [
+                "# HELP vision_responses_total Responses by endpoint and status code.",
+                "# TYPE vision_responses_total counter",
+            ]
+            for (endpoint, status), value in sorted(self._responses.items()):
+                lines.append(f'vision_responses_total{{endpoint="{endpoint}",status="{status}"}} {value}')
+
+            lines += [
+                "# HELP vision_pixels_total Working-resolution pixels processed.",
+                "# TYPE vision_pixels_total counter",
+                f"vision_pixels_total {self._pixels}",
+            ]
+
+        for name, value in (gauges or {}).items():
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+class SlowRequestSampler:
+    """
+    Logs requests slower than `threshold_ms` (0 disables) with their full
+    trace, and appends them as JSON lines to `path` if one is set.
+    """
+
+    def __init__(self, threshold_ms: float, path: Optional[str]):
+        self.threshold_ms = threshold_ms
+        self.path = path
+        self._lock = threading.Lock()
+
+    def maybe_record(self, endpoint: str, total: float, trace: Trace, extra: Optional[Dict[str, Any]] = None):
+        if self.threshold_ms <= 0 or total * 1000 < self.threshold_ms:
+            return
+        sample = {
+            "timestamp": time.time(),
+            "endpoint": endpoint,
+            "total_ms": round(total * 1000, 1),
+            "stages_ms": {name: round(seconds * 1000, 1) for name, seconds in trace.stages.items()},
+            "counts": trace.counts,
+            **(extra or {}),
+        }
+        logger.warning(f"Slow request on {endpoint}: {sample['total_ms']}ms {sample['stages_ms']}")
+        if not self.path:
+            return
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(json.dumps(sample) + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write slow request sample: {e}")
+
+metrics = Metrics()
+slow_requests = SlowRequestSampler(settings.SLOW_REQUEST_THRESHOLD_MS, settings.SLOW_REQUEST_LOG)
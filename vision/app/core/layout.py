@@ -1,111 +1,149 @@
 import logging
 import numpy as np
-from typing import List, Optional, Any
-from pydantic import BaseModel
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
-class ItemData(BaseModel):
-    label: Optional[str] = None
-    text: Optional[str] = None
-    bbox: List[int]  # [x1, y1, x2, y2]
+@dataclass
+class Regions:
+    """
+    Structure-of-arrays view of detected text regions.
+
+    bboxes: (N, 4) int32 [x1, y1, x2, y2], clipped to the image and non-empty.
+    texts: recognized text per region ("" until recognition runs).
+    scores: (N,) float32 recognition confidence (0 until recognition runs).
+    """
+    bboxes: np.ndarray
+    texts: List[str] = field(default_factory=list)
+    scores: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        if not self.texts:
+            self.texts = [""] * len(self.bboxes)
+        if self.scores is None:
+            self.scores = np.zeros(len(self.bboxes), dtype=np.float32)
+
+    @classmethod
+    def empty(cls) -> "Regions":
+        return cls(np.zeros((0, 4), dtype=np.int32))
+
+    def __len__(self) -> int:
+        return len(self.bboxes)
+
+    def take(self, index: Union[slice, np.ndarray]) -> "Regions":
+        """Subset (slice or index array), keeping the three arrays aligned."""
+        if isinstance(index, slice):
+            texts = self.texts[index]
+        else:
+            texts = [self.texts[i] for i in index]
+        return Regions(self.bboxes[index], texts, self.scores[index])
+
+    def top_to_bottom(self) -> "Regions":
+        """Regions sorted by top edge (stable), the reading order the merger uses."""
+        return self.take(np.argsort(self.bboxes[:, 1], kind="stable"))
+
+    def set_results(self, results: List[Tuple[str, float]]):
+        """Stores recognizer output, one (text, score) per region in order."""
+        self.texts = [text for text, _ in results]
+        self.scores = np.array([score for _, score in results], dtype=np.float32).reshape(-1)
+
+    def rescale(self, scale: float, image_shape: tuple) -> "Regions":
+        """
+        Scales bboxes by `scale` (e.g. from detector-input to working-image
+        coordinates), clipping to image bounds and dropping boxes that become empty.
+        """
+        bboxes = np.rint(self.bboxes * scale).astype(np.int32)
+        keep = clip_bboxes(bboxes, image_shape)
+        return Regions(bboxes[keep], [self.texts[i] for i in np.flatnonzero(keep)], self.scores[keep])
+
+def clip_bboxes(bboxes: np.ndarray, image_shape: tuple) -> np.ndarray:
+    """
+    Clips (N, 4) bboxes to the image in place.
+    Returns the boolean mask of boxes that are still non-empty.
+    """
+    h, w = image_shape[:2]
+    np.clip(bboxes[:, 0::2], 0, w, out=bboxes[:, 0::2])
+    np.clip(bboxes[:, 1::2], 0, h, out=bboxes[:, 1::2])
+    return (bboxes[:, 2] > bboxes[:, 0]) & (bboxes[:, 3] > bboxes[:, 1])
+
+def polygons_to_bboxes(polygons: np.ndarray, image_shape: tuple, scale: float = 1.0) -> np.ndarray:
+    """
+    Converts (N, K, 2) polygons to clipped (N, 4) int32 bboxes in one pass,
+    optionally scaling coordinates by `scale` first. Empty boxes are dropped.
+    """
+    polygons = np.asarray(polygons, dtype=np.float32)
+    if polygons.size == 0:
+        return np.zeros((0, 4), dtype=np.int32)
+    if scale != 1.0:
+        polygons = polygons * scale
+    bboxes = np.concatenate([polygons.min(axis=1), polygons.max(axis=1)], axis=1).astype(np.int32)
+    return bboxes[clip_bboxes(bboxes, image_shape)]
 
-def polygon_to_bbox(polygon: np.ndarray, image_shape: tuple) -> Optional[List[int]]:
+def _box_bounds(box_raw) -> Optional[List[float]]:
     """
-    Converts a polygon (N points) to an axis-aligned bounding box [x1, y1, x2, y2].
-    Ensures coordinates are within image bounds.
+    [x_min, y_min, x_max, y_max] of one raw detector box, or None if it is
+    malformed. Handles boxes wrapped as [coords, score].
     """
+    if isinstance(box_raw, (list, tuple)) and len(box_raw) == 2:
+        # If first element looks like 4 points, take it
+        if isinstance(box_raw[0], (list, np.ndarray)) and len(box_raw[0]) == 4:
+            box_raw = box_raw[0]
     try:
-        x_coords = polygon[:, 0]
-        y_coords = polygon[:, 1]
-        
-        x1 = int(np.min(x_coords))
-        y1 = int(np.min(y_coords))
-        x2 = int(np.max(x_coords))
-        y2 = int(np.max(y_coords))
-        
-        h, w = image_shape[:2]
-        x1 = max(0, x1)
-        y1 = max(0, y1)
-        x2 = min(w, x2)
-        y2 = min(h, y2)
-        
-        if x2 <= x1 or y2 <= y1:
-            return None
-            
-        return [x1, y1, x2, y2]
-    except Exception as e:
-        logger.warning(f"Failed to convert polygon to bbox: {e}")
+        box = np.asarray(box_raw, dtype=np.float32)
+    except (TypeError, ValueError):
         return None
+    # Should be at least 3 points to form a region
+    if box.ndim != 2 or box.shape[0] < 3 or box.shape[1] != 2:
+        return None
+    return [*box.min(axis=0), *box.max(axis=0)]
 
 class LayoutDetector:
-    def detect(self, image: np.ndarray, model_manager) -> List[ItemData]:
+    def detect(self, image: np.ndarray, model_manager) -> Regions:
         """
         Runs PaddleOCR layout detection (det=True, rec=False).
-        Returns ItemData with bbox populated.
+        Returns Regions with bboxes populated.
         """
         logger.info(f"Running PaddleOCR Layout Detection on image shape: {image.shape}")
-        
-        items = []
-        try:
-            if not model_manager.detector:
-                 logger.error("PaddleOCR detector not initialized.")
-                 return []
 
+        if not model_manager.detector:
+            logger.error("PaddleOCR detector not initialized.")
+            return Regions.empty()
+
+        try:
             # Run PaddleOCR inference
             # result is typically a list of results (one per image passed)
             result = model_manager.detector.ocr(image, cls=True)
-            
-            # If no text detected, result might be [None] or empty list
-            if not result or result[0] is None:
-                logger.info("PaddleOCR detected no text regions.")
-                return []
-
-            boxes = result[0]
-            logger.info(f"PaddleOCR detected {len(boxes)} raw regions.")
-
-            for i, box_raw in enumerate(boxes):
-                if i == 0:
-                    logger.info(f"Sample box_raw type: {type(box_raw)}")
-                    logger.info(f"Sample box_raw: {box_raw}")
-
-                try:
-                    # Handle case where box_raw is [coords, score] which causes shape (2,) error
-                    if isinstance(box_raw, (list, tuple)) and len(box_raw) == 2:
-                        # If first element looks like 4 points, take it
-                        if isinstance(box_raw[0], (list, np.ndarray)) and len(box_raw[0]) == 4:
-                            box_raw = box_raw[0]
-
-                    # Convert raw box to numpy array
-                    if isinstance(box_raw, list):
-                        box = np.array(box_raw, dtype=np.float32)
-                    elif isinstance(box_raw, np.ndarray):
-                        box = box_raw.astype(np.float32)
-                    else:
-                        logger.warning(f"Skipping box {i} with unknown type: {type(box_raw)}")
-                        continue
-                    
-                    # Validate shape (should be at least 3 points to form a region)
-                    if box.ndim != 2 or box.shape[0] < 3 or box.shape[1] != 2:
-                        logger.warning(f"Skipping box {i} with invalid shape: {box.shape}")
-                        continue
-                    
-                    bbox = polygon_to_bbox(box, image.shape)
-                    if bbox:
-                        items.append(ItemData(label=None, text=None, bbox=bbox))
-                    else:
-                        logger.debug(f"Skipping invalid/empty bbox for box {i}")
-                    
-                except Exception as ex:
-                    logger.warning(f"Error processing box {i}: {ex}")
-                    continue
-            
-            logger.info(f"Layout Detection complete. Processed {len(items)} valid bounding boxes.")
-            
         except Exception as e:
             logger.error(f"Layout detection critical failure: {e}")
-            pass
-            
-        return items
+            return Regions.empty()
+
+        # If no text detected, result might be [None] or empty list
+        if not result or result[0] is None or len(result[0]) == 0:
+            logger.info("PaddleOCR detected no text regions.")
+            return Regions.empty()
+
+        boxes = result[0]
+        logger.info(f"PaddleOCR detected {len(boxes)} raw regions.")
+
+        try:
+            # Common case: a uniform list of quadrilaterals, converted in one go
+            polygons = np.asarray(boxes, dtype=np.float32)
+            uniform = polygons.ndim == 3 and polygons.shape[1] >= 3 and polygons.shape[2] == 2
+        except (TypeError, ValueError):
+            uniform = False
+
+        if uniform:
+            bboxes = polygons_to_bboxes(polygons, image.shape)
+        else:
+            # Mixed or wrapped boxes: reduce each to its bounds, then clip together
+            bounds = [b for b in (_box_bounds(box) for box in boxes) if b is not None]
+            if len(bounds) < len(boxes):
+                logger.warning(f"Skipped {len(boxes) - len(bounds)} malformed boxes.")
+            bboxes = np.array(bounds, dtype=np.float32).reshape(-1, 4).astype(np.int32)
+            bboxes = bboxes[clip_bboxes(bboxes, image.shape)]
+
+        logger.info(f"Layout Detection complete. Processed {len(bboxes)} valid bounding boxes.")
+        return Regions(bboxes)
 
 layout_detector = LayoutDetector()
@@ -1,107 +1,193 @@
 import logging
 import re
-from typing import List, Optional
-from app.core.layout import ItemData
-from app.schemas import MenuItem
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+from app.core.instrumentation import count
+from app.core.layout import Regions
 
 logger = logging.getLogger(__name__)
 
-class Merger:
-    def merge(self, items: List[ItemData]) -> List[MenuItem]:
+# Regex for price (standalone)
+PRICE_PATTERN = re.compile(r'^\$?\d+(\.\d{2})?$')
+# Embedded price at the end (e.g., "Burger 22")
+EMBEDDED_PRICE_PATTERN = re.compile(r'\s+(\$?\d+(\.\d{2})?)$')
+COMMON_SECTIONS = ["mains", "starters", "desserts", "drinks", "beverages", "entrees", "sides", "salads", "appetizers"]
+
+# Menu items are plain dicts shaped like app.schemas.MenuItem; the pydantic
+# model is only built at the API boundary.
+MenuItemDict = Dict[str, Any]
+
+def new_item(section: str, name: str, confidence: float = 1.0) -> MenuItemDict:
+    return {"section": section, "name": name, "description": None, "price": None, "confidence": round(confidence, 4)}
+
+def _lower_confidence(item: MenuItemDict, score: float):
+    # An item is only as trustworthy as the weakest line it was built from
+    item["confidence"] = min(item["confidence"], round(score, 4))
+
+def prune_items(items: List[MenuItemDict], min_confidence: Optional[float]) -> List[MenuItemDict]:
+    """
+    Drops items whose confidence is below `min_confidence` (a per-request
+    threshold on top of the line-level settings.MIN_OCR_CONFIDENCE).
+    """
+    if not min_confidence:
+        return items
+    return [item for item in items if item.get("confidence", 1.0) >= min_confidence]
+
+class MergeState:
+    """
+    Incremental form of Merger.merge.
+
+    Feed recognized lines in top-to-bottom order. Items of the current section stay
+    pending (a following line may still attach a price or description) and
+    are released as soon as the next section header is seen, or by finish().
+
+    Lines recognized with a score below `min_confidence` (defaults to
+    settings.MIN_OCR_CONFIDENCE) are ignored, so they can neither become
+    items nor attach to one.
+    """
+
+    def __init__(self, min_confidence: Optional[float] = None):
+        self.min_confidence = settings.MIN_OCR_CONFIDENCE if min_confidence is None else min_confidence
+        self.current_section = "General"
+        self.last_menu_item: Optional[MenuItemDict] = None
+        self.pending: List[MenuItemDict] = []
+        self.emitted = 0
+        self.dropped = 0
+
+    def feed(self, text: Optional[str], score: float = 1.0) -> List[MenuItemDict]:
         """
-        Merges OCR items into structured MenuItems.
-        Sorts by Y coordinate and groups based on heuristics.
+        Consumes one recognized line and its recognition score. Returns the
+        items of the previous section if this line is a section header,
+        otherwise an empty list.
         """
-        logger.info(f"Merging {len(items)} items...")
-        
-        # 1. Sort items by Y (top to bottom)
-        # Assuming bbox is [x1, y1, x2, y2]
-        sorted_items = sorted(items, key=lambda item: item.bbox[1])
-        
-        menu_items: List[MenuItem] = []
-        current_section = "General"
-        last_menu_item: Optional[MenuItem] = None
-        
-        # Regex for price (standalone)
-        price_pattern = re.compile(r'^\$?\d+(\.\d{2})?$')
-        
-        for item in sorted_items:
-            text = item.text.strip() if item.text else ""
-            if not text:
-                continue
-                
-            # Check for embedded price at the end (e.g., "Burger 22")
-            embedded_price_match = re.search(r'\s+(\$?\d+(\.\d{2})?)$', text)
-            if embedded_price_match:
-                price_str = embedded_price_match.group(1)
-                name_text = text[:embedded_price_match.start()].strip()
-                
-                # Create item immediately
-                new_item = MenuItem(section=current_section, name=name_text)
+        text = text.strip() if text else ""
+        if not text:
+            return []
+        if score < self.min_confidence:
+            self.dropped += 1
+            logger.debug(f"Dropped low-confidence line ({score:.2f}): {text}")
+            return []
+
+        # Check for embedded price at the end (e.g., "Burger 22")
+        embedded_price_match = EMBEDDED_PRICE_PATTERN.search(text)
+        if embedded_price_match:
+            price_str = embedded_price_match.group(1)
+            name_text = text[:embedded_price_match.start()].strip()
+
+            # Create item immediately
+            item = new_item(self.current_section, name_text, score)
+            try:
+                item["price"] = float(re.sub(r'[^\d.]', '', price_str))
+            except Exception:
+                pass
+
+            self.pending.append(item)
+            self.last_menu_item = item
+            logger.debug(f"Created Item (Embedded Price): {name_text} - {item['price']}")
+            return []
+
+        # Heuristic 1: Is it a standalone price?
+        is_price = bool(PRICE_PATTERN.match(text))
+
+        # Heuristic 2: Is it a section header?
+        # Simple check: Short, no digits, common section words or looks like header
+        is_section = False
+        if not is_price and len(text) < 30 and not any(char.isdigit() for char in text):
+            if text.lower() in COMMON_SECTIONS or (text.isupper() and len(text) > 3):
+                is_section = True
+
+        if is_section:
+            self.current_section = text
+            self.last_menu_item = None # Reset context
+            logger.debug(f"Found Section: {self.current_section}")
+            return self._release()
+
+        if is_price:
+            # If we have a pending item, assign price
+            if self.last_menu_item and self.last_menu_item["price"] is None:
                 try:
-                    new_item.price = float(re.sub(r'[^\d.]', '', price_str))
+                    price_val = float(re.sub(r'[^\d.]', '', text))
+                    self.last_menu_item["price"] = price_val
+                    _lower_confidence(self.last_menu_item, score)
+                    logger.debug(f"Assigned Price {price_val} to {self.last_menu_item['name']}")
                 except Exception:
                     pass
-                
-                menu_items.append(new_item)
-                last_menu_item = new_item
-                logger.debug(f"Created Item (Embedded Price): {name_text} - {new_item.price}")
-                continue
-
-            # Heuristic 1: Is it a standalone price?
-            is_price = bool(price_pattern.match(text))
-            
-            # Heuristic 2: Is it a section header?
-            # Simple check: Short, no digits, common section words or looks like header
-            is_section = False
-            common_sections = ["mains", "starters", "desserts", "drinks", "beverages", "entrees", "sides", "salads", "appetizers"]
-            if not is_price and len(text) < 30 and not any(char.isdigit() for char in text):
-                if text.lower() in common_sections or (text.isupper() and len(text) > 3):
-                    is_section = True
-            
-            if is_section:
-                current_section = text
-                last_menu_item = None # Reset context
-                logger.debug(f"Found Section: {current_section}")
-                continue
-                
-            if is_price:
-                # If we have a pending item, assign price
-                if last_menu_item and last_menu_item.price is None:
-                    try:
-                        price_val = float(re.sub(r'[^\d.]', '', text))
-                        last_menu_item.price = price_val
-                        logger.debug(f"Assigned Price {price_val} to {last_menu_item.name}")
-                    except Exception:
-                        pass
-                else:
-                    logger.debug(f"Orphaned price: {text}")
-                continue
-            
-            # Content (Name or Description)
-            # If last_menu_item exists AND has no description AND looks like description
-            is_desc = False
-            if last_menu_item and not last_menu_item.description:
-                # Heuristic: Description is often longer, lower case, or contains ingredients (commas)
-                if len(text) > 30 or ',' in text or (any(c.islower() for c in text) and not text.istitle()):
-                     is_desc = True
-            
-            if is_desc:
-                last_menu_item.description = text
-                logger.debug(f"Assigned Description to {last_menu_item.name}")
             else:
-                # New Item Name
-                new_item = MenuItem(
-                    section=current_section,
-                    name=text,
-                    description=None,
-                    price=None
-                )
-                menu_items.append(new_item)
-                last_menu_item = new_item
-                logger.debug(f"Created Item: {text}")
-                
+                logger.debug(f"Orphaned price: {text}")
+            return []
+
+        # Content (Name or Description)
+        # If last_menu_item exists AND has no description AND looks like description
+        is_desc = False
+        if self.last_menu_item and not self.last_menu_item["description"]:
+            # Heuristic: Description is often longer, lower case, or contains ingredients (commas)
+            if len(text) > 30 or ',' in text or (any(c.islower() for c in text) and not text.istitle()):
+                 is_desc = True
+
+        if is_desc:
+            self.last_menu_item["description"] = text
+            _lower_confidence(self.last_menu_item, score)
+            logger.debug(f"Assigned Description to {self.last_menu_item['name']}")
+        else:
+            # New Item Name
+            item = new_item(self.current_section, text, score)
+            self.pending.append(item)
+            self.last_menu_item = item
+            logger.debug(f"Created Item: {text}")
+        return []
+
+    def finish(self) -> List[MenuItemDict]:
+        """Releases the items of the last open section."""
+        self.last_menu_item = None
+        if self.dropped:
+            logger.info(f"Ignored {self.dropped} lines below confidence {self.min_confidence}.")
+        return self._release()
+
+    def _release(self) -> List[MenuItemDict]:
+        released, self.pending = self.pending, []
+        self.emitted += len(released)
+        return released
+
+class Merger:
+    def merge(self, regions: Regions) -> List[MenuItemDict]:
+        """
+        Merges recognized regions into structured menu items.
+        Sorts by Y coordinate and groups based on heuristics.
+        """
+        logger.info(f"Merging {len(regions)} regions...")
+
+        # 1. Sort regions by Y (top to bottom)
+        # bboxes are [x1, y1, x2, y2]
+        order = np.argsort(regions.bboxes[:, 1], kind="stable")
+
+        state = MergeState()
+        menu_items: List[MenuItemDict] = []
+        for i in order.tolist():
+            menu_items.extend(state.feed(regions.texts[i], float(regions.scores[i])))
+        menu_items.extend(state.finish())
+        count("lines_low_confidence", state.dropped)
+
         logger.info(f"Merge complete. Produced {len(menu_items)} menu items.")
         return menu_items
 
+    def merge_pages(self, pages: List[Regions]) -> List[MenuItemDict]:
+        """
+        Merges the regions of several pages (in page order) into one list.
+        Each page is sorted top to bottom, but the merge state carries over
+        between pages, so a section (or an item's price/description) that
+        continues onto the next page stays attached.
+        """
+        logger.info(f"Merging {len(pages)} pages...")
+
+        state = MergeState()
+        menu_items: List[MenuItemDict] = []
+        for regions in pages:
+            for i in np.argsort(regions.bboxes[:, 1], kind="stable").tolist():
+                menu_items.extend(state.feed(regions.texts[i], float(regions.scores[i])))
+        menu_items.extend(state.finish())
+
+        logger.info(f"Multi-page merge complete. Produced {len(menu_items)} menu items.")
+        return menu_items
+
 merger = Merger()
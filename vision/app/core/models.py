@@ -1,9 +1,148 @@
+import hashlib
+import json
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+from typing import List
+from app.core.config import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
+def _package_version(name: str) -> str:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "unknown"
+
+class PaddleBackend:
+    """
+    PaddleOCR models run by Paddle Inference on CPU (default backend).
+    """
+    name = "paddle"
+
+    def create_engine(self, **kwargs):
+        from paddleocr import PaddleOCR
+        return PaddleOCR(use_angle_cls=True, lang='en', use_gpu=False, show_log=False, **kwargs)
+
+    def create_detector(self, engine):
+        """
+        Additional text detector with the same model and arguments as
+        `engine`, for running detection on several threads at once
+        (a predictor must not be shared between threads).
+        """
+        return type(engine.text_detector)(engine.args)
+
+    def describe(self) -> dict:
+        return {"backend": self.name}
+
+class OnnxBackend:
+    """
+    The same det/cls/rec models exported to ONNX (see scripts/export_onnx.py)
+    and run by ONNX Runtime through PaddleOCR's use_onnx mode.
+
+    PaddleOCR creates default sessions; they are replaced with sessions built
+    from our options so execution providers and thread counts are configurable.
+    Optionally applies dynamic INT8 weight quantization ("rec" or "all" models),
+    caching the quantized file next to the original.
+    """
+    name = "onnx"
+
+    def __init__(self, det_model: str, rec_model: str, cls_model: str, int8: str, providers: List[str], intra_op_threads: int):
+        self.det_model = det_model
+        self.rec_model = rec_model
+        self.cls_model = cls_model
+        self.int8 = int8
+        self.providers = providers
+        self.intra_op_threads = intra_op_threads
+
+    def _model_path(self, path: str, kind: str) -> str:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"ONNX {kind} model not found at {path}. Export it with scripts/export_onnx.py.")
+        if self.int8 == "all" or (self.int8 == "rec" and kind == "rec"):
+            return self._quantize(path)
+        return path
+
+    def _quantize(self, path: str) -> str:
+        quantized = f"{os.path.splitext(path)[0]}.int8.onnx"
+        if os.path.exists(quantized) and os.path.getmtime(quantized) >= os.path.getmtime(path):
+            return quantized
+
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        logger.info(f"Quantizing {path} to INT8...")
+        quantize_dynamic(path, quantized, weight_type=QuantType.QUInt8)
+        return quantized
+
+    def create_engine(self, **kwargs):
+        from paddleocr import PaddleOCR
+
+        det = self._model_path(self.det_model, "det")
+        rec = self._model_path(self.rec_model, "rec")
+        cls = self._model_path(self.cls_model, "cls")
+        engine = PaddleOCR(
+            use_angle_cls=True, lang='en', use_gpu=False, show_log=False,
+            use_onnx=True, det_model_dir=det, rec_model_dir=rec, cls_model_dir=cls,
+            **kwargs
+        )
+
+        for predictor, path in (
+            (engine.text_detector, det),
+            (engine.text_recognizer, rec),
+            (getattr(engine, "text_classifier", None), cls),
+        ):
+            if predictor is not None:
+                self._attach_session(predictor, path)
+
+        logger.info(f"ONNX Runtime sessions ready (providers={self.providers}, int8={self.int8}).")
+        return engine
+
+    def create_detector(self, engine):
+        """See PaddleBackend.create_detector."""
+        detector = type(engine.text_detector)(engine.args)
+        self._attach_session(detector, engine.args.det_model_dir)
+        return detector
+
+    def _attach_session(self, predictor, path: str):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.intra_op_threads > 0:
+            options.intra_op_num_threads = self.intra_op_threads
+
+        session = ort.InferenceSession(path, sess_options=options, providers=self.providers)
+        predictor.predictor = session
+        predictor.input_tensor = session.get_inputs()[0]
+
+    def describe(self) -> dict:
+        return {
+            "backend": self.name,
+            "int8": self.int8,
+            "models": [os.path.basename(p) for p in (self.det_model, self.rec_model, self.cls_model)],
+            "onnxruntime": _package_version("onnxruntime"),
+        }
+
+def create_backend(name: str):
+    """
+    Returns the inference backend selected by settings.INFERENCE_BACKEND.
+    """
+    if name == "paddle":
+        return PaddleBackend()
+    if name == "onnx":
+        return OnnxBackend(
+            det_model=settings.ONNX_DET_MODEL,
+            rec_model=settings.ONNX_REC_MODEL,
+            cls_model=settings.ONNX_CLS_MODEL,
+            int8=settings.ONNX_INT8,
+            providers=[p.strip() for p in settings.ONNX_PROVIDERS.split(",") if p.strip()],
+            intra_op_threads=settings.ONNX_INTRA_OP_THREADS
+        )
+    raise ValueError(f"Unknown inference backend: {name}")
+
 class ModelManager:
     _instance = None
 
@@ -12,10 +151,21 @@ class ModelManager:
             cls._instance = super(ModelManager, cls).__new__(cls)
             cls._instance.detector = None
             cls._instance.recognizer = None  # Reserved for Milestone 3
+            cls._instance.engine = None  # Shared det + cls + rec instance (fused mode)
+            cls._instance.pipeline_mode = settings.PIPELINE_MODE
+            cls._instance.backend = create_backend(settings.INFERENCE_BACKEND)
             cls._instance.initialized = False
+            cls._instance.ready = False  # Set once warm-up inference has run
         return cls._instance
 
     def load_models(self):
+        """
+        Builds the OCR models for the pipeline mode. In "two_stage" mode the
+        detector and recognizer are separate instances and load in parallel.
+        In "fused" mode (the default) one PaddleOCR instance creates its
+        det, cls and rec predictors itself, one after another, so that load
+        is serial; there is nothing to parallelize from here.
+        """
         if self.initialized:
             logger.info("Models already initialized.")
             return
@@ -26,18 +176,26 @@ class ModelManager:
             # Verify imports
             import cv2
             import numpy as np
-            from paddleocr import PaddleOCR
-
-            # Initialize PaddleOCR (Detection Only)
-            logger.info("Initializing PaddleOCR Detector...")
-            # det=True, rec=False means layout detection only (bounding boxes)
-            # use_angle_cls=True helps with rotated text
-            # lang='en' is default
-            self.detector = PaddleOCR(use_angle_cls=True, lang='en', det=True, rec=False, use_gpu=False, show_log=False)
-            
-            # Initialize Recognizer
-            logger.info("Initializing PaddleOCR Recognizer...")
-            self.recognizer = PaddleOCR(use_angle_cls=True, lang='en', det=False, rec=True, use_gpu=False, show_log=False)
+
+            if self.pipeline_mode == "fused":
+                # Single instance holding the det, cls and rec predictors.
+                # Detection and recognition share it, so each model is resident once.
+                logger.info(f"Initializing PaddleOCR (fused det + cls + rec, {self.backend.name} backend); "
+                            f"fused mode loads serially, set PIPELINE_MODE=two_stage for a parallel load...")
+                self.engine = self._timed_create("engine")
+                self.detector = self.engine
+                self.recognizer = self.engine
+            else:
+                # Detector and recognizer are independent instances; build them
+                # concurrently (model files are read and predictors created in
+                # native code, which releases the GIL).
+                # det=True, rec=False means layout detection only (bounding boxes)
+                logger.info("Initializing PaddleOCR Detector and Recognizer in parallel...")
+                with ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-load") as pool:
+                    detector = pool.submit(self._timed_create, "detector", det=True, rec=False)
+                    recognizer = pool.submit(self._timed_create, "recognizer", det=False, rec=True)
+                    self.detector = detector.result()
+                    self.recognizer = recognizer.result()
 
             self.initialized = True
             logger.info("Vision Models established (Detector & Recognizer Loaded).")
@@ -49,6 +207,55 @@ class ModelManager:
             logger.error(f"Failed to load models: {e}")
             raise e
 
+    def _timed_create(self, role: str, **kwargs):
+        start = time.perf_counter()
+        engine = self.backend.create_engine(**kwargs)
+        logger.info(f"PaddleOCR {role} initialized in {time.perf_counter() - start:.2f}s.")
+        return engine
+
+    def config_fingerprint(self) -> str:
+        """
+        Short hash of the model/version configuration. Anything derived from
+        model output (e.g. cached results) is only valid for the same fingerprint.
+        Computed from settings, so it is available before models are loaded.
+        """
+        config = {
+            "pipeline_mode": self.pipeline_mode,
+            "preprocess_mode": settings.PREPROCESS_MODE,
+            "min_ocr_confidence": settings.MIN_OCR_CONFIDENCE,
+            "pyramid": {
+                "target_text_height": settings.PYRAMID_TARGET_TEXT_HEIGHT,
+                "detect_max_side": settings.PYRAMID_DETECT_MAX_SIDE,
+            },
+            # TILE_WORKERS only changes parallelism, not output
+            "tiling": {
+                "mode": settings.TILING_MODE,
+                "size": settings.TILE_SIZE,
+                "overlap": settings.TILE_OVERLAP,
+                "nms_iou": settings.TILE_NMS_IOU,
+            },
+            "region_filter": {
+                "enabled": settings.REGION_FILTER_ENABLED,
+                "min_side": settings.REGION_MIN_SIDE,
+                "max_aspect": settings.REGION_MAX_ASPECT,
+                "min_std": settings.REGION_MIN_STD,
+                "min_edge_density": settings.REGION_MIN_EDGE_DENSITY,
+            },
+            # Sizes the "fast" tier's morphology detector
+            "fast_detect_max_side": settings.FAST_DETECT_MAX_SIDE,
+            # Recognizer batches are padded to their widest crop, which can shift results
+            "ocr_batch_size": settings.OCR_BATCH_SIZE,
+            "lang": "en",
+            "use_angle_cls": True,
+            "paddleocr": _package_version("paddleocr"),
+            **self.backend.describe(),
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+    @property
+    def fused(self) -> bool:
+        return self.engine is not None
+
     def check_health(self):
         return self.initialized and self.detector is not None
 
@@ -1,81 +1,136 @@
 import logging
 import numpy as np
 import cv2
-from typing import List
-from app.core.layout import ItemData
+from typing import List, Optional, Tuple
+from app.core.layout import Regions
+from app.core.config import settings
+from app.core.instrumentation import count, stage
 
 logger = logging.getLogger(__name__)
 
 class OCRProcessor:
-    def recognize(self, image: np.ndarray, items: List[ItemData], model_manager) -> List[ItemData]:
+    def recognize(self, image: np.ndarray, regions: Regions, model_manager, batch_size: Optional[int] = None, cls: bool = True) -> Regions:
         """
-        Takes the full image and a list of ItemData (with bboxes).
-        Crops the image for each item and runs OCR recognition.
-        Updates item.text.
+        Takes the full image and the detected Regions.
+        Crops the image for each bbox and runs OCR recognition,
+        filling regions.texts and regions.scores.
+
+        Crops are recognized in batches of `batch_size` (defaults to
+        settings.OCR_BATCH_SIZE). A batch size of 1 uses the legacy
+        one-call-per-crop path. `cls=False` skips angle classification.
         """
-        logger.info(f"Running OCR on {len(items)} items...")
-        
+        logger.info(f"Running OCR on {len(regions)} regions...")
+
         if not model_manager.recognizer:
             logger.error("OCR recognizer not initialized.")
-            return items
+            return regions
+
+        batch_size = batch_size or settings.OCR_BATCH_SIZE
+        if batch_size <= 1 or not hasattr(model_manager.recognizer, "text_recognizer"):
+            with stage("recognize"):
+                return self._recognize_sequential(image, regions, model_manager, cls=cls)
+
+        results = self.recognize_crops(self.crop_regions(image, regions), model_manager, batch_size=batch_size, cls=cls)
+        regions.set_results(results)
+
+        logger.info(f"OCR completed. Recognized text for {sum(1 for text in regions.texts if text)}/{len(regions)} regions.")
+        return regions
+
+    def crop_regions(self, image: np.ndarray, regions: Regions) -> List[np.ndarray]:
+        """
+        Crops the image for each region. Region bboxes are already clipped
+        and non-empty, so every crop is a plain view.
+        """
+        return [image[y1:y2, x1:x2] for x1, y1, x2, y2 in regions.bboxes.tolist()]
+
+    def recognize_crops(self, crops: List[np.ndarray], model_manager, batch_size: Optional[int] = None, cls: bool = True) -> List[Tuple[str, float]]:
+        """
+        Runs angle classification and text recognition over a list of crops in batches.
+
+        Crops are sorted by aspect ratio so each batch holds lines of similar width,
+        which keeps the padding the recognizer adds to reach a common (fixed height)
+        input shape small. Results are returned in the original crop order as
+        (text, score) tuples; a failed batch yields ("", 0.0) for its crops.
+        """
+        batch_size = max(1, batch_size or settings.OCR_BATCH_SIZE)
+        results: List[Tuple[str, float]] = [("", 0.0)] * len(crops)
+        if not crops:
+            return results
+
+        engine = model_manager.recognizer
+        classifier = getattr(engine, "text_classifier", None) if cls and getattr(engine, "use_angle_cls", False) else None
+
+        # The recognizer splits its input into rec_batch_num sized chunks internally,
+        # align it with ours so every call below is exactly one inference.
+        engine.text_recognizer.rec_batch_num = batch_size
+        if classifier is not None:
+            classifier.cls_batch_num = batch_size
 
-        count = 0
-        for i, item in enumerate(items):
+        count("crop_pixels", sum(crop.shape[0] * crop.shape[1] for crop in crops))
+        ratios = np.array([crop.shape[1] / float(crop.shape[0]) for crop in crops], dtype=np.float32)
+        order = np.argsort(ratios, kind="stable")
+
+        for start in range(0, len(order), batch_size):
+            batch_idx = order[start:start + batch_size]
             try:
-                x1, y1, x2, y2 = item.bbox
-                
-                # Validate bbox against image dimensions
-                h, w = image.shape[:2]
-                x1 = max(0, x1)
-                y1 = max(0, y1)
-                x2 = min(w, x2)
-                y2 = min(h, y2)
-                
-                if x2 <= x1 or y2 <= y1:
-                    # logger.warning(f"Invalid crop for item {i}: {item.bbox}")
-                    continue
-                
-                # Crop
-                crop = image[y1:y2, x1:x2]
-                
-                if crop.size == 0:
-                    continue
+                # PaddleOCR predictors expect 3-channel BGR input
+                batch = [
+                    cv2.cvtColor(crops[i], cv2.COLOR_GRAY2BGR) if crops[i].ndim == 2 else crops[i]
+                    for i in batch_idx
+                ]
+                if classifier is not None:
+                    with stage("classify"):
+                        batch, _, _ = classifier(batch)
+
+                with stage("recognize"):
+                    rec_res, _ = engine.text_recognizer(batch)
+                for i, (text, score) in zip(batch_idx, rec_res):
+                    results[i] = (text.strip(), float(score))
+            except Exception as e:
+                logger.error(f"OCR failed for batch starting at {start}: {e}")
+                continue
 
+        return results
+
+    def _recognize_sequential(self, image: np.ndarray, regions: Regions, model_manager, cls: bool = True) -> Regions:
+        results: List[Tuple[str, float]] = []
+        for i, crop in enumerate(self.crop_regions(image, regions)):
+            text = ""
+            scores = []
+            try:
                 # Run Recognition
                 # det=False means treat the input image (crop) as a single text line/region
-                # cls=True enables angle classification (upright adjustment)
+                # cls enables angle classification (upright adjustment)
                 # result format for single image with det=False is usually: [(text, score)]
                 # Note: PaddleOCR.ocr returns a list of results.
-                result = model_manager.recognizer.ocr(crop, cls=True, det=False)
-                
-                text = ""
+                result = model_manager.recognizer.ocr(crop, cls=cls, det=False)
+
                 if result:
                     # Handle potential list wrapping
                     # Standard output: [('text', 0.99), ...]
                     # Sometimes wrapped in list if batch?
-                    
+
                     for res in result:
                         if isinstance(res, tuple):
                             # (text, score)
                             text += res[0] + " "
+                            scores.append(res[1])
                         elif isinstance(res, list):
                             # [[(text, score)]] case?
                             for sub_res in res:
                                 if isinstance(sub_res, tuple):
                                     text += sub_res[0] + " "
-                    
-                    text = text.strip()
+                                    scores.append(sub_res[1])
 
-                item.text = text
-                if text:
-                    count += 1
-                # logger.debug(f"OCR Item {i}: {text}")
+                    text = text.strip()
 
             except Exception as e:
-                logger.error(f"OCR failed for item {i}: {e}")
-                continue
-                
-        logger.info(f"OCR completed. Recognized text for {count}/{len(items)} items.")
-        return items
+                logger.error(f"OCR failed for region {i}: {e}")
+
+            results.append((text, float(np.mean(scores)) if scores else 0.0))
+
+        regions.set_results(results)
+        logger.info(f"OCR completed. Recognized text for {sum(1 for text in regions.texts if text)}/{len(regions)} regions.")
+        return regions
 
 ocr_processor = OCRProcessor()
@@ -0,0 +1,169 @@
+import logging
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+from app.core.instrumentation import count, stage, tracing
+from app.core.models import model_manager as worker_model_manager
+from app.core.preprocessing import PreprocessedImage, preprocess
+from app.core.detectors import TextDetector, get_tier
+from app.core.layout import Regions
+from app.core.ocr import ocr_processor
+from app.core.region_filter import region_filter
+from app.core.merger import merger, MergeState, MenuItemDict
+
+logger = logging.getLogger(__name__)
+
+def detect_regions(prepared: PreprocessedImage, model_manager, detector: Optional[TextDetector] = None) -> Tuple[np.ndarray, Regions]:
+    """
+    Runs detection only, with `detector` (defaults to the tier from
+    settings.EXTRACT_MODE), then drops regions not worth recognizing
+    (see RegionFilter).
+
+    Returns:
+        (image, regions): image to crop from and the detected Regions.
+    """
+    detector = detector or get_tier().detector
+    image, regions = detector.detect(prepared, model_manager)
+    if settings.REGION_FILTER_ENABLED:
+        # Same coordinates as `image`, without the BGR conversion
+        regions = region_filter.filter(prepared.image, regions)
+    return image, regions
+
+def run_pipeline(image_bytes: bytes, model_manager, mode: Optional[str] = None) -> List[MenuItemDict]:
+    """
+    Runs the full vision pipeline on raw image bytes.
+
+    Args:
+        image_bytes: Raw image bytes from the upload.
+        model_manager: Loaded ModelManager for the current process.
+        mode: Speed/quality tier (see detectors.TIERS); defaults to settings.EXTRACT_MODE.
+
+    Returns:
+        List[MenuItemDict]: Structured menu items (MenuItem-shaped dicts).
+
+    Raises:
+        ValueError: If the image cannot be decoded or the mode is unknown.
+    """
+    tier = get_tier(mode)
+
+    # Preprocess the image (Milestone 2)
+    prepared = preprocess(image_bytes)
+
+    # Text detection with the tier's detector
+    image, regions = detect_regions(prepared, model_manager, tier.detector)
+
+    # OCR Recognition (Milestone 4)
+    # Recognize text in each region
+    regions = ocr_processor.recognize(image, regions, model_manager, cls=tier.classify)
+
+    # Merge (Milestone 5)
+    # Combine geometry + text into final menu items
+    with stage("merge"):
+        return merger.merge(regions)
+
+def stream_pipeline(image_bytes: bytes, model_manager, chunk_size: Optional[int] = None, mode: Optional[str] = None) -> Iterator[List[MenuItemDict]]:
+    """
+    Streaming variant of run_pipeline.
+
+    Regions are recognized top to bottom in chunks of `chunk_size` (defaults to
+    settings.STREAM_CHUNK_SIZE) and fed to an incremental MergeState. Each time
+    a section header closes a section its items are yielded, so callers see the
+    first section long before the last region is recognized.
+
+    Raises:
+        ValueError: If the image cannot be decoded or the mode is unknown.
+    """
+    tier = get_tier(mode)
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    prepared = preprocess(image_bytes)
+    image, regions = detect_regions(prepared, model_manager, tier.detector)
+    logger.info(f"Streaming {len(regions)} regions in chunks of {chunk_size}.")
+
+    # Same top-to-bottom order Merger.merge uses
+    regions = regions.top_to_bottom()
+
+    state = MergeState()
+    for start in range(0, len(regions), chunk_size):
+        chunk = ocr_processor.recognize(image, regions.take(slice(start, start + chunk_size)), model_manager, cls=tier.classify)
+
+        completed: List[MenuItemDict] = []
+        with stage("merge"):
+            for text, score in zip(chunk.texts, chunk.scores.tolist()):
+                completed.extend(state.feed(text, score))
+        if completed:
+            yield completed
+
+    remaining = state.finish()
+    count("lines_low_confidence", state.dropped)
+    if remaining:
+        yield remaining
+
+def run_batch_pipeline(images: List[bytes], model_manager, mode: Optional[str] = None) -> Tuple[List[List[MenuItemDict]], List[MenuItemDict]]:
+    """
+    Runs the pipeline over several pages of one menu.
+
+    Every page is preprocessed and detected on its own, then the crops of all
+    pages are recognized together so recognizer batches are shared across
+    pages. Results are split back per page.
+
+    Returns:
+        (pages, merged): per-page menu items and one list merged across pages.
+
+    Raises:
+        ValueError: If any image cannot be decoded or the mode is unknown.
+    """
+    tier = get_tier(mode)
+    page_regions: List[Regions] = []
+    all_crops: List[np.ndarray] = []
+    for page_index, image_bytes in enumerate(images):
+        try:
+            prepared = preprocess(image_bytes)
+        except ValueError as e:
+            raise ValueError(f"Page {page_index + 1}: {e}")
+        image, regions = detect_regions(prepared, model_manager, tier.detector)
+        page_regions.append(regions)
+        all_crops.extend(ocr_processor.crop_regions(image, regions))
+
+    logger.info(f"Recognizing {len(all_crops)} regions across {len(images)} pages.")
+    results = ocr_processor.recognize_crops(all_crops, model_manager, cls=tier.classify)
+
+    offset = 0
+    for regions in page_regions:
+        regions.set_results(results[offset:offset + len(regions)])
+        offset += len(regions)
+
+    with stage("merge"):
+        pages = [merger.merge(regions) for regions in page_regions]
+        merged = merger.merge_pages(page_regions)
+    return pages, merged
+
+def extract_menu_job(image_bytes: bytes, mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Inference job entry point, executed inside an inference worker.
+    Uses the worker's own ModelManager and returns plain dicts (items plus
+    the stage trace) so the result pickles cheaply back to the API process.
+    """
+    with tracing() as trace:
+        items = run_pipeline(image_bytes, worker_model_manager, mode=mode)
+    return {"items": items, "trace": trace.to_dict()}
+
+def extract_menu_stream_job(image_bytes: bytes, mode: Optional[str] = None) -> Iterator[Any]:
+    """
+    Streaming inference job; yields lists of item dicts as sections complete,
+    then a final {"trace": ...} dict.
+    """
+    with tracing() as trace:
+        yield from stream_pipeline(image_bytes, worker_model_manager, mode=mode)
+    yield {"trace": trace.to_dict()}
+
+def extract_menu_batch_job(images: List[bytes], mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Multi-page inference job; returns per-page and merged item dicts.
+    """
+    with tracing() as trace:
+        pages, merged = run_batch_pipeline(images, worker_model_manager, mode=mode)
+    return {
+        "pages": [{"items": items} for items in pages],
+        "items": merged,
+        "trace": trace.to_dict(),
+    }
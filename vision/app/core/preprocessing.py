@@ -1,6 +1,13 @@
+import io
 import cv2
 import numpy as np
 import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+from PIL import Image
+from app.core import simplified_preprocessing
+from app.core.config import settings
+from app.core.instrumentation import count, stage
 
 logger = logging.getLogger(__name__)
 
@@ -19,19 +26,21 @@ def preprocess_image(image_bytes: bytes) -> np.ndarray:
     """
     try:
         # 1. Decode bytes to numpy array
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with stage("decode"):
+            nparr = np.frombuffer(image_bytes, np.uint8)
+            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
         if img is None:
             raise ValueError("Failed to decode image data")
             
-        # 2. Convert to Grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # 3. Enhance contrast using CLAHE
-        # Clip limit 2.0 and tile size 8x8 are standard defaults that work well for text
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray)
+        with stage("clahe"):
+            # 2. Convert to Grayscale
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+            # 3. Enhance contrast using CLAHE
+            # Clip limit 2.0 and tile size 8x8 are standard defaults that work well for text
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            enhanced = clahe.apply(gray)
         
         logger.info(f"Image preprocessed successfully. Shape: {enhanced.shape}")
         
@@ -40,3 +49,164 @@ def preprocess_image(image_bytes: bytes) -> np.ndarray:
     except Exception as e:
         logger.error(f"Error during preprocessing: {e}")
         raise
+
+@dataclass
+class PreprocessedImage:
+    """
+    Output of `preprocess`.
+
+    image: working-resolution image that recognition crops are taken from.
+    detect_image: image handed to the text detector (may be smaller than `image`).
+    detect_scale: factor mapping detect_image coordinates to image coordinates.
+    """
+    image: np.ndarray
+    detect_image: np.ndarray
+    detect_scale: float = 1.0
+    mode: str = "clahe"
+
+# cv2.imdecode flags for grayscale decoding at 1/1, 1/2, 1/4 and 1/8 scale.
+# For JPEG the reduction happens inside the DCT, so a reduced decode is far
+# cheaper than decoding at full size and resizing.
+_REDUCED_GRAYSCALE = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# EXIF orientations that rotate by 90 or 270 degrees (with or without a mirror)
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+_EXIF_ORIENTATION = 0x0112
+
+def probe_dimensions(image_bytes: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Reads (width, height) from the image header without decoding pixel data,
+    as cv2 will decode it: with the EXIF orientation applied, so rotated
+    phone photos report their displayed (swapped) size.
+    Returns None if the format is not recognized.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            width, height = img.size
+            if img.getexif().get(_EXIF_ORIENTATION) in _TRANSPOSED_ORIENTATIONS:
+                return height, width
+            return width, height
+    except Exception:
+        return None
+
+def estimate_text_height(gray: np.ndarray) -> Optional[float]:
+    """
+    Estimates the typical text height (in pixels of `gray`) as the median
+    height of dark connected components that are plausibly glyphs or words.
+    Returns None when too few candidates are found to trust the estimate.
+    """
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 10)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    stats = stats[1:]  # drop background
+
+    heights = stats[:, cv2.CC_STAT_HEIGHT]
+    widths = stats[:, cv2.CC_STAT_WIDTH]
+    areas = stats[:, cv2.CC_STAT_AREA]
+    mask = (
+        (heights >= 2)
+        & (heights < gray.shape[0] * 0.2)
+        & (widths < gray.shape[1] * 0.5)
+        & (areas >= 3)
+    )
+    if np.count_nonzero(mask) < 10:
+        return None
+    return float(np.median(heights[mask]))
+
+def _decode_error() -> ValueError:
+    logger.error("Error during preprocessing: Failed to decode image data")
+    return ValueError("Failed to decode image data")
+
+def _preprocess_clahe(image_bytes: bytes) -> PreprocessedImage:
+    enhanced = preprocess_image(image_bytes)
+    return PreprocessedImage(image=enhanced, detect_image=enhanced, mode="clahe")
+
+def _preprocess_simplified(image_bytes: bytes) -> PreprocessedImage:
+    with stage("decode"):
+        img = simplified_preprocessing.preprocess_image(image_bytes)
+    return PreprocessedImage(image=img, detect_image=img, mode="simplified")
+
+def _preprocess_pyramid(image_bytes: bytes) -> PreprocessedImage:
+    """
+    Decodes at the smallest power-of-two reduction that keeps text at least
+    settings.PYRAMID_TARGET_TEXT_HEIGHT pixels tall, applies CLAHE at that
+    working resolution, and derives a detector input capped at
+    settings.PYRAMID_DETECT_MAX_SIDE (the detector downsizes to its own limit anyway).
+    """
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    dims = probe_dimensions(image_bytes)
+
+    reduction = 1
+    with stage("decode"):
+        thumb = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if thumb is None:
+        raise _decode_error()
+
+    if dims is not None:
+        thumb_factor = dims[0] / float(thumb.shape[1])
+        with stage("text_height"):
+            text_height = estimate_text_height(thumb)
+        if text_height is not None:
+            full_text_height = text_height * thumb_factor
+            for factor in (8, 4, 2):
+                if full_text_height / factor >= settings.PYRAMID_TARGET_TEXT_HEIGHT:
+                    reduction = factor
+                    break
+            logger.info(f"Estimated text height {full_text_height:.1f}px at full size, decoding at 1/{reduction}.")
+        else:
+            logger.info("Text height estimate unavailable, decoding at full size.")
+
+    with stage("decode"):
+        gray = thumb if reduction == 8 else cv2.imdecode(nparr, _REDUCED_GRAYSCALE[reduction])
+    if gray is None:
+        raise _decode_error()
+
+    with stage("clahe"):
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        enhanced = clahe.apply(gray)
+
+    detect_image = enhanced
+    detect_scale = 1.0
+    long_side = max(enhanced.shape[:2])
+    if long_side > settings.PYRAMID_DETECT_MAX_SIDE:
+        detect_scale = long_side / float(settings.PYRAMID_DETECT_MAX_SIDE)
+        with stage("resize"):
+            detect_image = cv2.resize(
+                enhanced,
+                (int(round(enhanced.shape[1] / detect_scale)), int(round(enhanced.shape[0] / detect_scale))),
+                interpolation=cv2.INTER_AREA
+            )
+        # Exact ratio after rounding
+        detect_scale = enhanced.shape[1] / float(detect_image.shape[1])
+
+    logger.info(f"Pyramid preprocessing: working shape {enhanced.shape}, detector shape {detect_image.shape}.")
+    return PreprocessedImage(image=enhanced, detect_image=detect_image, detect_scale=detect_scale, mode="pyramid")
+
+PREPROCESSORS: Dict[str, Callable[[bytes], PreprocessedImage]] = {
+    "clahe": _preprocess_clahe,
+    "pyramid": _preprocess_pyramid,
+    "simplified": _preprocess_simplified,
+}
+
+def preprocess(image_bytes: bytes, mode: Optional[str] = None) -> PreprocessedImage:
+    """
+    Runs the preprocessing variant selected by `mode` (defaults to
+    settings.PREPROCESS_MODE): "clahe", "pyramid" or "simplified".
+
+    Raises:
+        ValueError: If the image cannot be decoded or the mode is unknown.
+    """
+    mode = mode or settings.PREPROCESS_MODE
+    preprocessor = PREPROCESSORS.get(mode)
+    if preprocessor is None:
+        raise ValueError(f"Unknown preprocessing mode: {mode}")
+    # Each preprocessor logs its own failures
+    prepared = preprocessor(image_bytes)
+
+    count("pixels", prepared.image.shape[0] * prepared.image.shape[1])
+    count("detect_pixels", prepared.detect_image.shape[0] * prepared.detect_image.shape[1])
+    return prepared
@@ -0,0 +1,112 @@
+import logging
+from typing import Dict
+import cv2
+import numpy as np
+from app.core.config import settings
+from app.core.instrumentation import count, stage
+from app.core.layout import Regions
+
+logger = logging.getLogger(__name__)
+
+# Intensity step between neighbouring pixels that counts as an edge
+EDGE_DELTA = 24
+
+class RegionFilter:
+    """
+    Drops regions that cannot hold readable text before they reach the
+    recognizer: slivers and specks (size), rules and borders (aspect ratio),
+    blank or near-uniform patches (intensity std) and smooth areas such as
+    photos or logos without stroke edges (edge density).
+
+    Geometry is checked for all boxes at once from the bbox array; pixel
+    statistics are computed only for boxes that pass it.
+    """
+
+    def __init__(self, min_side: int, max_aspect: float, min_std: float, min_edge_density: float):
+        self.min_side = min_side
+        self.max_aspect = max_aspect
+        self.min_std = min_std
+        self.min_edge_density = min_edge_density
+
+    def crop_stats(self, image: np.ndarray, regions: Regions) -> np.ndarray:
+        """
+        (N, 2) float32 array of [intensity std, edge density] per region.
+        Edge density is the fraction of horizontal neighbour pairs differing
+        by more than EDGE_DELTA, which text strokes produce in abundance.
+
+        Both come from integral images built once per page, so each region
+        costs four lookups regardless of its size.
+        """
+        stats = np.zeros((len(regions), 2), dtype=np.float32)
+        if len(regions) == 0:
+            return stats
+        if image.ndim == 3:
+            # Green channel is a close enough luminance proxy for thresholds
+            image = image[:, :, 1]
+        sums, squares = cv2.integral2(image, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        edges = (cv2.absdiff(image[:, 1:], image[:, :-1]) > EDGE_DELTA).astype(np.uint8)
+        edge_sums = cv2.integral(edges, sdepth=cv2.CV_32S)
+
+        # Regions are clipped to the image and non-empty (see Regions)
+        x1, y1, x2, y2 = regions.bboxes.astype(np.int64).T
+
+        def box_sum(table: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+            return table[y2, right] - table[y1, right] - table[y2, left] + table[y1, left]
+
+        area = (x2 - x1) * (y2 - y1)
+        mean = box_sum(sums, x1, x2) / area
+        stats[:, 0] = np.sqrt(np.maximum(box_sum(squares, x1, x2) / area - mean * mean, 0.0))
+
+        # Column x of the edge mask compares pixels x and x+1, so a box spans edge columns x1..x2-2
+        pairs = (x2 - 1 - x1) * (y2 - y1)
+        edge_counts = box_sum(edge_sums, x1, x2 - 1)
+        stats[:, 1] = np.where(pairs > 0, edge_counts / np.maximum(pairs, 1), 0.0)
+        return stats
+
+    def filter(self, image: np.ndarray, regions: Regions) -> Regions:
+        """
+        Returns the regions worth recognizing. Skipped counts per reason are
+        added to the current trace and logged.
+        """
+        if len(regions) == 0:
+            return regions
+
+        with stage("region_filter"):
+            bboxes = regions.bboxes
+            widths = bboxes[:, 2] - bboxes[:, 0]
+            heights = bboxes[:, 3] - bboxes[:, 1]
+
+            too_small = (widths < self.min_side) | (heights < self.min_side)
+            aspect = np.maximum(widths, heights) / np.maximum(np.minimum(widths, heights), 1)
+            bad_aspect = ~too_small & (aspect > self.max_aspect)
+
+            candidates = np.flatnonzero(~too_small & ~bad_aspect)
+            stats = self.crop_stats(image, regions.take(candidates))
+            flat = np.zeros(len(regions), dtype=bool)
+            no_edges = np.zeros(len(regions), dtype=bool)
+            flat[candidates] = stats[:, 0] < self.min_std
+            no_edges[candidates] = ~flat[candidates] & (stats[:, 1] < self.min_edge_density)
+
+            keep = ~(too_small | bad_aspect | flat | no_edges)
+
+        skipped: Dict[str, int] = {
+            "size": int(too_small.sum()),
+            "aspect": int(bad_aspect.sum()),
+            "flat": int(flat.sum()),
+            "edges": int(no_edges.sum()),
+        }
+        total = sum(skipped.values())
+        count("regions_skipped", total)
+        for reason, value in skipped.items():
+            if value:
+                count(f"skipped_{reason}", value)
+        if total:
+            logger.info(f"Region filter skipped {total}/{len(regions)} regions {skipped}.")
+        return regions.take(np.flatnonzero(keep))
+
+region_filter = RegionFilter(
+    min_side=settings.REGION_MIN_SIDE,
+    max_aspect=settings.REGION_MAX_ASPECT,
+    min_std=settings.REGION_MIN_STD,
+    min_edge_density=settings.REGION_MIN_EDGE_DENSITY
+)
@@ -0,0 +1,270 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import cv2
+import numpy as np
+from app.core.config import settings
+from app.core.instrumentation import count, stage
+from app.core.layout import Regions, clip_bboxes, polygons_to_bboxes
+
+logger = logging.getLogger(__name__)
+
+# A box within this many pixels of a tile edge that is not an image edge may be cut off
+EDGE_MARGIN = 2
+# Fragments of one text line cut at a tile edge overlap vertically by at least this much
+FRAGMENT_MIN_Y_IOU = 0.5
+# ...or the smaller one lies (mostly) inside the other, e.g. a sliver of a line cut horizontally
+FRAGMENT_MIN_CONTAINMENT = 0.8
+
+def tile_origins(length: int, tile: int, overlap: int) -> List[int]:
+    """
+    Start offsets of tiles covering [0, length) with at least `overlap`
+    pixels shared between neighbours. The last tile is aligned to the end.
+    """
+    if length <= tile:
+        return [0]
+    step = max(1, tile - overlap)
+    origins = list(range(0, length - tile, step))
+    origins.append(length - tile)
+    return origins
+
+def tile_grid(shape: tuple, tile: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """Tiles as [x1, y1, x2, y2] covering an image of `shape`."""
+    h, w = shape[:2]
+    return [
+        (x, y, min(x + tile, w), min(y + tile, h))
+        for y in tile_origins(h, tile, overlap)
+        for x in tile_origins(w, tile, overlap)
+    ]
+
+def overlapping_pairs(boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index pairs (i, j) of (N, 4) boxes that intersect. Found by sorting on
+    y1 and sweeping, so only boxes sharing some vertical extent are ever
+    compared: memory is linear in the number of candidate pairs instead of
+    N x N, which matters on large boards with thousands of boxes.
+    """
+    n = len(boxes)
+    if n < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    order = np.argsort(boxes[:, 1], kind="stable")
+    y1 = boxes[order, 1]
+    y2 = boxes[order, 3]
+    # Boxes after position k (in y1 order) that start above the bottom of box k
+    ends = np.searchsorted(y1, y2, side="left")
+    counts = np.maximum(ends - np.arange(n) - 1, 0)
+    first = np.repeat(np.arange(n), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    i = order[first]
+    j = order[first + 1 + offsets]
+    intersects = np.minimum(boxes[i, 2], boxes[j, 2]) > np.maximum(boxes[i, 0], boxes[j, 0])
+    return i[intersects], j[intersects]
+
+def pair_iou(boxes: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """IoU of boxes[i] and boxes[j], element-wise."""
+    a = boxes[i].astype(np.float32)
+    b = boxes[j].astype(np.float32)
+    inter = (
+        np.clip(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0, None)
+        * np.clip(np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0, None)
+    )
+    areas_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    areas_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(areas_a + areas_b - inter, 1e-6)
+
+def nms(boxes: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Greedy non-maximum suppression, larger boxes first (the detector gives
+    no per-box score). Returns the indices of kept boxes.
+    """
+    n = len(boxes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    i, j = overlapping_pairs(boxes)
+    over = pair_iou(boxes, i, j) > iou_threshold
+    # Suppression lists per box, in both directions (CSR layout)
+    src = np.concatenate([i[over], j[over]])
+    dst = np.concatenate([j[over], i[over]])
+    order = np.argsort(src, kind="stable")
+    src, dst = src[order], dst[order]
+    starts = np.searchsorted(src, np.arange(n + 1))
+
+    areas = (boxes[:, 2] - boxes[:, 0]).astype(np.int64) * (boxes[:, 3] - boxes[:, 1])
+    suppressed = np.zeros(n, dtype=bool)
+    keep = []
+    for k in np.argsort(-areas, kind="stable"):
+        if suppressed[k]:
+            continue
+        keep.append(k)
+        suppressed[dst[starts[k]:starts[k + 1]]] = True
+    return np.array(sorted(keep), dtype=np.int64)
+
+def join_fragments(boxes: np.ndarray, tile_ids: np.ndarray, on_edge: np.ndarray) -> np.ndarray:
+    """
+    Unions boxes that are pieces of one text line cut at tile edges: boxes
+    from different tiles, at least one touching an interior tile edge, that
+    intersect and either share most of their vertical extent (a line cut
+    vertically) or where one mostly contains the other (a sliver of a line
+    cut horizontally).
+    """
+    if not on_edge.any():
+        return boxes
+    i, j = overlapping_pairs(boxes)
+    candidates = (tile_ids[i] != tile_ids[j]) & (on_edge[i] | on_edge[j])
+    i, j = i[candidates], j[candidates]
+
+    a = boxes[i].astype(np.float32)
+    b = boxes[j].astype(np.float32)
+    x_inter = np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0])
+    y_inter = np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1])
+    y_union = np.maximum(a[:, 3], b[:, 3]) - np.minimum(a[:, 1], b[:, 1])
+    areas_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    areas_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    containment = x_inter * y_inter / np.maximum(np.minimum(areas_a, areas_b), 1e-6)
+    linked = (y_inter / np.maximum(y_union, 1e-6) >= FRAGMENT_MIN_Y_IOU) | (containment >= FRAGMENT_MIN_CONTAINMENT)
+    i, j = i[linked], j[linked]
+
+    # Connected components by min-label propagation over the linked pairs
+    n = len(boxes)
+    labels = np.arange(n)
+    while True:
+        updated = labels.copy()
+        np.minimum.at(updated, i, labels[j])
+        np.minimum.at(updated, j, labels[i])
+        updated = updated[updated]  # pointer jumping
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+
+    roots, inverse = np.unique(labels, return_inverse=True)
+    joined = np.empty((len(roots), 4), dtype=np.int32)
+    joined[:, :2] = np.iinfo(np.int32).max
+    joined[:, 2:] = np.iinfo(np.int32).min
+    np.minimum.at(joined[:, 0], inverse, boxes[:, 0])
+    np.minimum.at(joined[:, 1], inverse, boxes[:, 1])
+    np.maximum.at(joined[:, 2], inverse, boxes[:, 2])
+    np.maximum.at(joined[:, 3], inverse, boxes[:, 3])
+    return joined
+
+class TiledDetector:
+    """
+    Runs text detection on overlapping tiles in parallel, so small text on
+    very large or panoramic images is detected at full resolution instead of
+    after the detector downsizes the whole image to its side limit.
+
+    Each pool thread owns its own detector (predictors are not thread-safe),
+    created from the loaded engine on first use. Boxes are mapped back to
+    image coordinates, fragments cut at tile edges are joined and duplicates
+    from the overlaps are removed with NMS.
+    """
+
+    def __init__(self, tile_size: int, overlap: int, workers: int, iou_threshold: float):
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.iou_threshold = iou_threshold
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def should_tile(self, shape: tuple, mode: Optional[str] = None) -> bool:
+        """
+        "on" always tiles images larger than one tile; "auto" only when a
+        single pass would shrink the image by more than 2x.
+        """
+        mode = mode or settings.TILING_MODE
+        long_side = max(shape[:2])
+        if mode == "on":
+            return long_side > self.tile_size
+        if mode == "auto":
+            return long_side > 2 * self.tile_size
+        return False
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tile-det")
+            return self._pool
+
+    def _detector(self, model_manager):
+        detector = getattr(self._local, "detector", None)
+        if detector is None:
+            detector = model_manager.backend.create_detector(model_manager.engine)
+            # The tile is the detector input; never let it downsize a tile
+            resize = detector.preprocess_op[0]
+            if hasattr(resize, "limit_side_len"):
+                resize.limit_side_len = max(resize.limit_side_len, self.tile_size)
+            self._local.detector = detector
+        return detector
+
+    def _detect_tile(self, image: np.ndarray, tile: Tuple[int, int, int, int], model_manager) -> np.ndarray:
+        x1, y1, x2, y2 = tile
+        dt_boxes, _ = self._detector(model_manager)(image[y1:y2, x1:x2])
+        if dt_boxes is None or len(dt_boxes) == 0:
+            return np.zeros((0, 4), dtype=np.int32)
+        bboxes = polygons_to_bboxes(dt_boxes, (y2 - y1, x2 - x1))
+        bboxes[:, 0::2] += x1
+        bboxes[:, 1::2] += y1
+        return bboxes
+
+    def detect(self, image: np.ndarray, model_manager) -> Tuple[np.ndarray, Regions]:
+        """
+        Returns (image, regions) like the other text detectors, with `image`
+        converted to 3-channel BGR.
+        """
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        tiles = tile_grid(image.shape, self.tile_size, self.overlap)
+        count("tiles", len(tiles))
+
+        with stage("detect"):
+            per_tile = list(self._executor().map(lambda tile: self._detect_tile(image, tile, model_manager), tiles))
+
+        with stage("tile_merge"):
+            boxes = np.concatenate(per_tile).reshape(-1, 4) if per_tile else np.zeros((0, 4), dtype=np.int32)
+            tile_ids = np.concatenate([np.full(len(b), i) for i, b in enumerate(per_tile)]) if per_tile else np.zeros(0, dtype=np.int64)
+            on_edge = self._on_interior_edge(boxes, tile_ids, tiles, image.shape)
+            raw = len(boxes)
+            boxes = join_fragments(boxes, tile_ids, on_edge)
+            boxes = boxes[nms(boxes, self.iou_threshold)]
+            boxes = boxes[clip_bboxes(boxes, image.shape)]
+
+        logger.info(f"Tiled detection: {len(tiles)} tiles, {raw} raw boxes, {len(boxes)} after merging.")
+        count("regions", len(boxes))
+        return image, Regions(boxes)
+
+    def _on_interior_edge(self, boxes: np.ndarray, tile_ids: np.ndarray, tiles: List[tuple], shape: tuple) -> np.ndarray:
+        h, w = shape[:2]
+        t = np.array(tiles, dtype=np.int32).reshape(-1, 4)[tile_ids]
+        return (
+            ((boxes[:, 0] <= t[:, 0] + EDGE_MARGIN) & (t[:, 0] > 0))
+            | ((boxes[:, 1] <= t[:, 1] + EDGE_MARGIN) & (t[:, 1] > 0))
+            | ((boxes[:, 2] >= t[:, 2] - EDGE_MARGIN) & (t[:, 2] < w))
+            | ((boxes[:, 3] >= t[:, 3] - EDGE_MARGIN) & (t[:, 3] < h))
+        )
+
+    def prepare(self, model_manager):
+        """
+        Creates the per-thread detectors up front (and runs each once), so
+        the first tiled request does not pay for it.
+        """
+        barrier = threading.Barrier(self.workers)
+        blank = np.full((64, 64, 3), 255, dtype=np.uint8)
+
+        def _init(_):
+            # Hold every thread until all have started, so each pool thread gets one task
+            barrier.wait()
+            self._detector(model_manager)(blank)
+
+        list(self._executor().map(_init, range(self.workers)))
+        logger.info(f"Prepared {self.workers} tile detectors.")
+
+tiled_detector = TiledDetector(
+    tile_size=settings.TILE_SIZE,
+    overlap=settings.TILE_OVERLAP,
+    workers=settings.TILE_WORKERS,
+    iou_threshold=settings.TILE_NMS_IOU
+)
@@ -0,0 +1,92 @@
+import logging
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Short menu covering a header, name + price lines, a standalone price and a
+# description, so detection, classification and several recognizer input
+# widths are all exercised.
+WARMUP_LINES = [
+    "STARTERS",
+    "Tomato Soup 6.50",
+    "Caesar Salad",
+    "12.00",
+    "romaine, parmesan, croutons",
+    "MAINS",
+    "Grilled Salmon with Lemon Butter 24.95",
+    "Steak Frites 28.00",
+]
+
+@lru_cache(maxsize=1)
+def warmup_image() -> bytes:
+    """
+    Synthetic menu page, JPEG encoded, so warm-up also goes through decoding
+    and preprocessing. Generated once instead of shipping an image file.
+    """
+    line_step = 56
+    page = np.full(((len(WARMUP_LINES) + 2) * line_step, 900, 3), 240, dtype=np.uint8)
+    for i, line in enumerate(WARMUP_LINES, start=1):
+        cv2.putText(page, line, (40, i * line_step), cv2.FONT_HERSHEY_SIMPLEX, 1.1, (20, 20, 20), 2, cv2.LINE_AA)
+    ok, buf = cv2.imencode(".jpg", page, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    if not ok:
+        raise ValueError("Failed to encode warm-up image")
+    return buf.tobytes()
+
+class StartupTimer:
+    """
+    Records how long each startup phase takes, for one breakdown log line.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def log(self):
+        total = time.perf_counter() - self.started
+        breakdown = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.phases.items())
+        logger.info(f"{self.name} startup: {breakdown}, total={total:.2f}s")
+
+def warm_up(model_manager):
+    """
+    Runs one full pipeline pass on the synthetic menu. Paddle (and ONNX
+    Runtime) initialize kernels and memory pools lazily on the first run;
+    paying that here keeps it off the first real request.
+    """
+    from app.core.config import settings
+    from app.core.pipeline import run_pipeline
+    from app.core.tiling import tiled_detector
+
+    items = run_pipeline(warmup_image(), model_manager)
+    logger.info(f"Warm-up inference produced {len(items)} items.")
+
+    if settings.TILING_MODE != "off" and model_manager.fused:
+        tiled_detector.prepare(model_manager)
+
+def prepare_models(model_manager, name: str, warmup: bool = True) -> StartupTimer:
+    """
+    Loads the models and runs the warm-up pass, then marks the manager ready.
+    Logs the per-phase timing breakdown.
+    """
+    timer = StartupTimer(name)
+    with timer.phase("load_models"):
+        model_manager.load_models()
+    if warmup:
+        with timer.phase("warmup"):
+            warm_up(model_manager)
+    model_manager.ready = True
+    timer.log()
+    return timer
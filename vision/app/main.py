@@ -12,70 +12,412 @@ logger = logging.getLogger(__name__)
 # Ensure the 'app' namespace logs are captured at INFO level
 logging.getLogger("app").setLevel(logging.INFO)
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import asyncio
+import json
+import time
+from typing import Any, Callable, List, Literal, Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
+from app.core.config import settings
+from app.core.admission import AdmissionTimeoutError, pixel_budget, request_pixels
 from app.core.models import model_manager
-from app.core.preprocessing import preprocess_image
-from app.core.layout import layout_detector
-from app.core.ocr import ocr_processor
-from app.core.merger import merger
-from app.schemas import MenuResponse, MenuItem
+from app.core.cache import result_cache
+from app.core.executor import inference_executor, QueueFullError, InferenceTimeoutError
+from app.core.instrumentation import Trace, metrics, server_timing, slow_requests
+from app.core.merger import prune_items
+from app.core.pipeline import extract_menu_job, extract_menu_stream_job, extract_menu_batch_job
+from app.core.warmup import StartupTimer, prepare_models
+from app.schemas import MenuResponse, MenuItem, BatchMenuResponse
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Load models on startup
+# Set if model loading or warm-up failed; /readyz then reports the error
+startup_error = None
+
+async def warm_start():
+    """
+    Loads models and runs the warm-up inference in the background, so the
+    process answers /livez right away and /readyz turns ready only once
+    requests will be served at steady-state latency.
+    """
+    global startup_error
+    timer = StartupTimer("Vision service")
     try:
-        model_manager.load_models()
+        if inference_executor.uses_processes:
+            # Each worker process loads and warms up its own models
+            with timer.phase("start_workers"):
+                inference_executor.start()
+            with timer.phase("workers_ready"):
+                deadline = time.perf_counter() + settings.STARTUP_TIMEOUT_S
+                while not inference_executor.is_ready():
+                    if inference_executor.startup_error is not None:
+                        raise RuntimeError(f"Inference worker failed to load models: {inference_executor.startup_error}")
+                    if time.perf_counter() > deadline:
+                        raise RuntimeError(f"Inference workers not ready after {settings.STARTUP_TIMEOUT_S}s")
+                    await asyncio.sleep(0.1)
+        else:
+            with timer.phase("prepare_models"):
+                try:
+                    await asyncio.wait_for(
+                        run_in_threadpool(prepare_models, model_manager, "Inline inference", settings.WARMUP_ENABLED),
+                        timeout=settings.STARTUP_TIMEOUT_S
+                    )
+                except asyncio.TimeoutError:
+                    raise RuntimeError(f"Models not ready after {settings.STARTUP_TIMEOUT_S}s")
+        timer.log()
     except Exception as e:
-        logger.error(f"Startup failed: {e}")
+        startup_error = str(e) or type(e).__name__
+        logger.error(f"Startup failed: {startup_error}")
+        # Workers without models would fail every job
+        inference_executor.shutdown()
+
+def is_ready() -> bool:
+    # A load that finishes after the startup timeout does not make the service ready
+    if startup_error is not None:
+        return False
+    if inference_executor.uses_processes:
+        return inference_executor.is_ready()
+    return model_manager.ready
+
+def not_ready() -> HTTPException:
+    # Requests before models are loaded would fail or return (and cache) empty results
+    detail = f"Service not ready: {startup_error}" if startup_error else "Service is starting, models are loading"
+    return HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup = asyncio.create_task(warm_start())
     yield
-    # Clean up if needed
+    startup.cancel()
+    inference_executor.shutdown()
 
 app = FastAPI(title="Vision Service", lifespan=lifespan)
 
+def record_request(endpoint: str, status: int, started: float, trace: Trace, response: Optional[Response] = None):
+    """
+    Feeds a finished request into /metrics and the slow request sampler,
+    and sets its Server-Timing header.
+    """
+    total = time.perf_counter() - started
+    if response is not None:
+        response.headers["Server-Timing"] = server_timing(trace, total)
+    metrics.observe(endpoint, status, total, trace)
+    slow_requests.maybe_record(endpoint, total, trace)
+
+async def admit(trace: Trace, contents: List[bytes]) -> int:
+    """
+    Reserves pixel budget for the decoded uploads, recording any wait as
+    the "admission" stage. Returns the reserved pixels for release_when_done.
+
+    Raises:
+        AdmissionTimeoutError: If the budget did not free up in time.
+    """
+    pixels = request_pixels(contents)
+    waited = await pixel_budget.acquire(pixels)
+    if waited:
+        trace.add("admission", waited)
+    return pixels
+
+def release_when_done(pixels: int) -> Callable[[], Any]:
+    """
+    on_done callback for the executor: gives the pixels back once the job
+    has finished on the worker, not when the request stops waiting for it.
+    """
+    return lambda: asyncio.ensure_future(pixel_budget.release(pixels))
+
+def over_budget(e: AdmissionTimeoutError) -> HTTPException:
+    # Clients retrying right away would just queue again for the full wait
+    retry_after = max(1, int(settings.ADMISSION_MAX_WAIT_S))
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(retry_after)})
+
+async def run_job(trace: Trace, fn: Callable, *args, on_done: Optional[Callable[[], Any]] = None) -> Any:
+    """
+    Submits an inference job and merges the trace it returns. Time not
+    spent inside the worker (waiting for a free worker, IPC) is recorded
+    as the "queue" stage.
+    """
+    start = time.perf_counter()
+    result = await inference_executor.submit(fn, *args, on_done=on_done)
+    worker_trace = result.pop("trace", {})
+    trace.merge(worker_trace)
+    trace.add("queue", max(0.0, time.perf_counter() - start - sum(worker_trace.get("stages", {}).values())))
+    return result
+
 @app.get("/health")
 async def health_check():
     """
     Simple minimal verification that models are active.
     """
-    if model_manager.check_health():
-        return {"status": "ok", "models": "active"}
+    if inference_executor.uses_processes:
+        healthy = inference_executor.is_running()
+    else:
+        healthy = model_manager.check_health()
+
+    if healthy:
+        return {"status": "ok", "models": "active", "in_flight": inference_executor.in_flight}
     else:
         # In a real scenario this might be 503, but for now we report status
         return {"status": "error", "models": "inactive"}
 
+@app.get("/livez")
+async def liveness():
+    """
+    The process is up and serving HTTP. Does not depend on models.
+    """
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness():
+    """
+    200 once models are loaded and warmed up (in every initial worker),
+    503 while starting or if startup failed.
+    """
+    if startup_error is not None:
+        return JSONResponse(status_code=503, content={"status": "error", "detail": startup_error})
+    if not is_ready():
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready", "in_flight": inference_executor.in_flight}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Request, per-stage latency and region count histograms in the
+    Prometheus text format.
+    """
+    gauges = {
+        "vision_in_flight_requests": inference_executor.in_flight,
+        "vision_ready_workers": inference_executor.ready_workers,
+        **pixel_budget.gauges(),
+    }
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Result cache hit/miss counters and tier sizes.
+    """
+    return {"enabled": settings.RESULT_CACHE_ENABLED, **result_cache.stats()}
+
+def prune(items: List[dict], min_confidence: Optional[float], trace: Trace) -> List[dict]:
+    kept = prune_items(items, min_confidence)
+    if len(kept) < len(items):
+        trace.count("items_pruned", len(items) - len(kept))
+    return kept
+
+# Per-request item threshold. Lines below settings.MIN_OCR_CONFIDENCE are
+# already ignored server-side, so this can only make the result stricter.
+MinConfidence = Query(None, ge=0.0, le=1.0, description="Drop items with a lower confidence")
+
+# Speed/quality tier, see app.core.detectors.TIERS
+ExtractMode = Optional[Literal["fast", "balanced", "accurate"]]
+ModeQuery = Query(None, description="fast, balanced or accurate (defaults to the configured EXTRACT_MODE)")
+
 @app.post("/extract-menu", response_model=MenuResponse)
-async def extract_menu(image: UploadFile = File(...)):
+async def extract_menu(response: Response, image: UploadFile = File(...), min_confidence: Optional[float] = MinConfidence, mode: ExtractMode = ModeQuery):
     """
     Ingests a menu image and returns structured menu items.
+    Preprocessing, detection, OCR and merging run on an inference worker;
+    the event loop only handles I/O. Stage timings are returned in the
+    Server-Timing header.
+
+    `mode` trades accuracy for latency: "accurate" runs detection, angle
+    classification and recognition, "balanced" skips angle classification
+    and "fast" also swaps the DB detector for morphological text proposals.
     """
+    if not is_ready():
+        raise not_ready()
+    mode = mode or settings.EXTRACT_MODE
+    started = time.perf_counter()
+    trace = Trace()
+    status = 200
     try:
         # Read image bytes
-        content = await image.read()
-        
-        # Preprocess the image (Milestone 2)
-        # This verifies ingestion and preprocessing works deterministically
-        processed_image = preprocess_image(content)
-        
-        # Layout Extraction (Milestone 2)
-        # Detect text regions using PaddleOCR (Bounding Box Only)
-        layout_items = layout_detector.detect(processed_image, model_manager)
-        logger.info(f"Layout Extraction: Detected {len(layout_items)} text regions")
-        
-        # OCR Recognition (Milestone 4)
-        # Recognize text in each region
-        ocr_items = ocr_processor.recognize(processed_image, layout_items, model_manager)
-        
-        # Merge (Milestone 5)
-        # Combine geometry + text into final MenuItem objects
-        menu_items = merger.merge(ocr_items)
-        
-        return {"items": menu_items}
-        
+        with trace.stage("read"):
+            content = await image.read()
+        trace.count("bytes", len(content))
+
+        cache_key = None
+        if settings.RESULT_CACHE_ENABLED:
+            # Hashing decodes a reduced copy of the image, keep it off the event loop
+            with trace.stage("cache_lookup"):
+                cached_items, cache_key = await run_in_threadpool(result_cache.lookup, content, mode)
+            if cached_items is not None:
+                trace.count("cache_hit", 1)
+                return {"items": prune(cached_items, min_confidence, trace)}
+
+        pixels = await admit(trace, [content])
+        result = await run_job(trace, extract_menu_job, content, mode, on_done=release_when_done(pixels))
+        menu_items = result["items"]
+
+        if cache_key is not None and is_ready():
+            await run_in_threadpool(result_cache.store, cache_key, menu_items)
+
+        return {"items": prune(menu_items, min_confidence, trace)}
+
+    except AdmissionTimeoutError as e:
+        status = 503
+        raise over_budget(e)
+    except QueueFullError as e:
+        status = 503
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceTimeoutError as e:
+        status = 504
+        raise HTTPException(status_code=504, detail=str(e))
     except ValueError as e:
+        status = 400
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        status = 500
         logger.error(f"Error processing image: {e}")
         raise HTTPException(status_code=500, detail="Internal processing error")
+    finally:
+        record_request("extract_menu", status, started, trace, response)
+
+@app.post("/extract-menu/batch", response_model=BatchMenuResponse)
+async def extract_menu_batch(response: Response, images: List[UploadFile] = File(...), min_confidence: Optional[float] = MinConfidence, mode: ExtractMode = ModeQuery):
+    """
+    Ingests several photos of one menu (pages in upload order) and returns
+    per-page results plus one item list merged across pages.
+    Recognition batches are shared across all pages.
+    """
+    if not is_ready():
+        raise not_ready()
+    if len(images) > settings.BATCH_MAX_IMAGES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_IMAGES} images per request")
+
+    started = time.perf_counter()
+    trace = Trace()
+    status = 200
+    try:
+        with trace.stage("read"):
+            contents = [await image.read() for image in images]
+        trace.count("bytes", sum(len(content) for content in contents))
+
+        pixels = await admit(trace, contents)
+        result = await run_job(trace, extract_menu_batch_job, contents, mode, on_done=release_when_done(pixels))
+        return {
+            "pages": [{"items": prune_items(page["items"], min_confidence)} for page in result["pages"]],
+            "items": prune(result["items"], min_confidence, trace),
+        }
+
+    except AdmissionTimeoutError as e:
+        status = 503
+        raise over_budget(e)
+    except QueueFullError as e:
+        status = 503
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceTimeoutError as e:
+        status = 504
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        status = 400
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        status = 500
+        logger.error(f"Error processing images: {e}")
+        raise HTTPException(status_code=500, detail="Internal processing error")
+    finally:
+        record_request("extract_menu_batch", status, started, trace, response)
+
+@app.post("/extract-menu/stream")
+async def extract_menu_stream(image: UploadFile = File(...), min_confidence: Optional[float] = MinConfidence, mode: ExtractMode = ModeQuery):
+    """
+    Streaming variant of /extract-menu.
+    Returns newline-delimited JSON, one MenuItem per line, emitted section by
+    section as regions are recognized top to bottom.
+
+    Headers go out with the first section, so Server-Timing only covers the
+    time to first chunk; the full trace is recorded in /metrics.
+    """
+    if not is_ready():
+        raise not_ready()
+    mode = mode or settings.EXTRACT_MODE
+    started = time.perf_counter()
+    trace = Trace()
+    try:
+        with trace.stage("read"):
+            content = await image.read()
+        trace.count("bytes", len(content))
+
+        cache_key = None
+        if settings.RESULT_CACHE_ENABLED:
+            with trace.stage("cache_lookup"):
+                cached_items, cache_key = await run_in_threadpool(result_cache.lookup, content, mode)
+            if cached_items is not None:
+                trace.count("cache_hit", 1)
+                record_request("extract_menu_stream", 200, started, trace)
+                return StreamingResponse(
+                    (json.dumps(item) + "\n" for item in prune(cached_items, min_confidence, trace)),
+                    media_type="application/x-ndjson",
+                    headers={"Server-Timing": server_timing(trace, time.perf_counter() - started)}
+                )
+
+        # Held until the job finishes on the worker
+        pixels = await admit(trace, [content])
+        chunks = inference_executor.stream(extract_menu_stream_job, content, mode, on_done=release_when_done(pixels))
+        # Pull the first chunk before responding so decode errors and
+        # backpressure still map to proper status codes
+        with trace.stage("first_chunk"):
+            first_chunk = await chunks.__anext__()
+
+    except StopAsyncIteration:
+        first_chunk = None
+    except AdmissionTimeoutError as e:
+        record_request("extract_menu_stream", 503, started, trace)
+        raise over_budget(e)
+    except QueueFullError as e:
+        record_request("extract_menu_stream", 503, started, trace)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceTimeoutError as e:
+        record_request("extract_menu_stream", 504, started, trace)
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        record_request("extract_menu_stream", 400, started, trace)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        record_request("extract_menu_stream", 500, started, trace)
+        logger.error(f"Error processing image: {e}")
+        raise HTTPException(status_code=500, detail="Internal processing error")
+
+    first_chunk_timing = server_timing(trace, time.perf_counter() - started)
+
+    async def body():
+        collected = []
+        try:
+            if first_chunk is not None:
+                async for chunk in _prepend(first_chunk, chunks):
+                    if isinstance(chunk, dict):
+                        # Final message of the job: its stage trace
+                        trace.merge(chunk["trace"])
+                        continue
+                    # The cache keeps the unpruned result
+                    collected.extend(chunk)
+                    for item in prune(chunk, min_confidence, trace):
+                        yield json.dumps(item) + "\n"
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            logger.error(f"Error streaming menu items: {e}")
+            yield json.dumps({"error": "Internal processing error"}) + "\n"
+            record_request("extract_menu_stream", 500, started, trace)
+            return
+        finally:
+            await chunks.aclose()
+
+        record_request("extract_menu_stream", 200, started, trace)
+        if cache_key is not None and is_ready():
+            await run_in_threadpool(result_cache.store, cache_key, collected)
+
+    # Closes the job's stream even if the client disconnected before the body started
+    return StreamingResponse(
+        body(),
+        media_type="application/x-ndjson",
+        headers={"Server-Timing": first_chunk_timing},
+        background=BackgroundTask(chunks.aclose)
+    )
 
+async def _prepend(first: Any, rest):
+    yield first
+    async for value in rest:
+        yield value
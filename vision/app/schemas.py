@@ -6,6 +6,12 @@ class MenuItem(BaseModel):
     name: str
     description: Optional[str] = None
     price: Optional[float] = None
+    # Lowest recognition score among the lines the item was built from
+    confidence: Optional[float] = None
 
 class MenuResponse(BaseModel):
     items: List[MenuItem]
+
+class BatchMenuResponse(BaseModel):
+    pages: List[MenuResponse]
+    items: List[MenuItem]  # all pages merged, sections continue across pages
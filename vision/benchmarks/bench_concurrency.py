@@ -0,0 +1,84 @@
+"""
+Concurrent /extract-menu throughput against a running vision service.
+
+Fires batches of uploads at increasing concurrency while polling /health,
+so both throughput scaling and event-loop responsiveness are visible.
+Compare runs with INFERENCE_WORKERS=0 and INFERENCE_WORKERS=N.
+
+Usage (from the vision/ directory):
+    python -m benchmarks.bench_concurrency --url http://localhost:8001 --concurrency 1 2 4 8
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from benchmarks.synthetic import encode_jpeg, random_lines, render_menu
+
+async def _upload(client: httpx.AsyncClient, payload: bytes) -> float:
+    start = time.perf_counter()
+    resp = await client.post("/extract-menu", files={"image": ("menu.jpg", payload, "image/jpeg")})
+    resp.raise_for_status()
+    return time.perf_counter() - start
+
+async def _poll_health(client: httpx.AsyncClient, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get("/health")
+            samples.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+
+async def run(url: str, levels: list, requests_per_level: int, lines: int):
+    payload = encode_jpeg(render_menu(random_lines(lines)))
+    rows = []
+    async with httpx.AsyncClient(base_url=url, timeout=300.0) as client:
+        # Warm-up request so model initialization isn't measured
+        await _upload(client, payload)
+
+        for concurrency in levels:
+            sem = asyncio.Semaphore(concurrency)
+            health_samples: list = []
+            stop = asyncio.Event()
+            poller = asyncio.create_task(_poll_health(client, stop, health_samples))
+
+            async def bounded():
+                async with sem:
+                    return await _upload(client, payload)
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*[bounded() for _ in range(requests_per_level)])
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await poller
+
+            latencies.sort()
+            row = {
+                "concurrency": concurrency,
+                "requests": requests_per_level,
+                "throughput_rps": round(requests_per_level / elapsed, 3),
+                "p50_s": round(statistics.median(latencies), 3),
+                "p95_s": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+                "health_max_s": round(max(health_samples), 3) if health_samples else None,
+            }
+            rows.append(row)
+            print(f"c={concurrency:>2}  {row['throughput_rps']:.2f} req/s  p50={row['p50_s']}s  p95={row['p95_s']}s  /health max={row['health_max_s']}s")
+
+    print(json.dumps(rows, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--lines", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.requests, args.lines))
+
+if __name__ == "__main__":
+    main()
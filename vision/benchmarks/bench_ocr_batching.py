@@ -0,0 +1,53 @@
+"""
+Recognition throughput vs batch size for OCRProcessor.
+
+Usage (from the vision/ directory, with the PaddleOCR models available):
+    python -m benchmarks.bench_ocr_batching --crops 200 --batch-sizes 1 4 8 16 32 64
+"""
+import argparse
+import json
+import time
+
+from app.core.models import model_manager
+from app.core.ocr import ocr_processor
+from benchmarks.synthetic import random_crops
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crops", type=int, default=200)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    model_manager.load_models()
+    crops = random_crops(args.crops)
+
+    # Warm up the predictors so graph initialization isn't attributed to the first batch size
+    ocr_processor.recognize_crops(crops[:8], model_manager, batch_size=8)
+
+    rows = []
+    for batch_size in args.batch_sizes:
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            if batch_size == 1:
+                # Legacy path: one PaddleOCR.ocr call per crop
+                for crop in crops:
+                    model_manager.recognizer.ocr(crop, cls=True, det=False)
+            else:
+                ocr_processor.recognize_crops(crops, model_manager, batch_size=batch_size)
+            timings.append(time.perf_counter() - start)
+
+        best = min(timings)
+        rows.append({
+            "batch_size": batch_size,
+            "crops": len(crops),
+            "best_s": round(best, 4),
+            "crops_per_s": round(len(crops) / best, 1),
+        })
+        print(f"batch={batch_size:>3}  best={best:.3f}s  {len(crops) / best:8.1f} crops/s")
+
+    print(json.dumps(rows, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Latency and peak memory of each preprocessing variant.
+
+Peak memory is the tracemalloc high-water mark for one call; NumPy and
+OpenCV's Python bindings allocate arrays through tracked allocators, so it
+covers the decoded image and every intermediate.
+
+Usage (from the vision/ directory):
+    python -m benchmarks.bench_preprocessing --width 4000 --text-height 60
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from app.core.preprocessing import PREPROCESSORS, preprocess
+from benchmarks.synthetic import encode_jpeg, random_lines, render_menu
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=4000, help="Synthetic photo width (12MP at 4000x3000)")
+    parser.add_argument("--text-height", type=int, default=60)
+    parser.add_argument("--lines", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=sorted(PREPROCESSORS))
+    args = parser.parse_args()
+
+    page = render_menu(random_lines(args.lines), width=args.width, line_height=args.text_height)
+    payload = encode_jpeg(page)
+    print(f"Input: {page.shape[1]}x{page.shape[0]} JPEG, {len(payload) / 1024:.0f} KiB")
+
+    rows = []
+    for mode in args.modes:
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            preprocess(payload, mode=mode)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        result = preprocess(payload, mode=mode)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        row = {
+            "mode": mode,
+            "best_ms": round(min(timings) * 1000, 1),
+            "peak_mib": round(peak / (1024 * 1024), 1),
+            "working_shape": list(result.image.shape),
+            "detect_shape": list(result.detect_image.shape),
+        }
+        rows.append(row)
+        print(f"{mode:<11} {row['best_ms']:>8.1f} ms  peak {row['peak_mib']:>7.1f} MiB  working {row['working_shape']}  detect {row['detect_shape']}")
+
+    print(json.dumps(rows, indent=2))
+
+if __name__ == "__main__":
+    main()
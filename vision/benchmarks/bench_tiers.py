@@ -0,0 +1,83 @@
+"""
+Latency and item-level agreement of the extraction tiers (fast, balanced,
+accurate) on fixed synthetic menus.
+
+Every tier runs in-process on the same seeded menu images. Items are
+compared with the accurate tier (agreement) and with the rendered ground
+truth (accuracy), using the same section/name/price matching as
+compare_backends. Requires the OCR models for the configured backend.
+
+Usage (from the vision/ directory):
+    python -m benchmarks.bench_tiers --menus 8 --repeats 3
+"""
+import argparse
+import json
+import time
+
+from app.core.detectors import TIERS
+from app.core.instrumentation import tracing
+from app.core.models import model_manager
+from app.core.pipeline import run_pipeline
+from benchmarks.compare_backends import agreement
+from benchmarks.synthetic import encode_jpeg, random_menu, render_menu
+
+def run_tier(mode: str, payloads: list, repeats: int) -> dict:
+    results = []
+    stages = {}
+    for payload in payloads:
+        timings = []
+        for _ in range(repeats):
+            with tracing() as trace:
+                start = time.perf_counter()
+                items = run_pipeline(payload, model_manager, mode=mode)
+                timings.append(time.perf_counter() - start)
+        for name, seconds in trace.to_dict()["stages"].items():
+            stages[name] = stages.get(name, 0.0) + seconds
+        results.append({"best_s": min(timings), "items": items})
+    return {
+        "results": results,
+        "stages_ms": {name: round(seconds * 1000 / len(payloads), 1) for name, seconds in stages.items()},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=list(TIERS), choices=list(TIERS))
+    parser.add_argument("--menus", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--line-height", type=int, default=36)
+    args = parser.parse_args()
+
+    menus = [random_menu(seed) for seed in range(args.menus)]
+    payloads = [encode_jpeg(render_menu(lines, line_height=args.line_height)) for lines, _ in menus]
+    truth = [items for _, items in menus]
+
+    model_manager.load_models()
+    # Warm up every tier before timing
+    for mode in args.modes:
+        run_pipeline(payloads[0], model_manager, mode=mode)
+
+    runs = {mode: run_tier(mode, payloads, args.repeats) for mode in args.modes}
+    reference = runs.get("accurate")
+
+    rows = []
+    for mode, run in runs.items():
+        per_menu = run["results"]
+        row = {
+            "mode": mode,
+            "mean_latency_s": round(sum(r["best_s"] for r in per_menu) / len(per_menu), 4),
+            "stages_ms": run["stages_ms"],
+            "accuracy_vs_truth": round(sum(agreement(t, r["items"]) for t, r in zip(truth, per_menu)) / len(per_menu), 4),
+        }
+        if reference is not None:
+            scores = [agreement(ref["items"], r["items"]) for ref, r in zip(reference["results"], per_menu)]
+            row["agreement_vs_accurate"] = round(sum(scores) / len(scores), 4)
+            row["min_agreement_vs_accurate"] = round(min(scores), 4)
+        rows.append(row)
+
+    for row in rows:
+        agreement_text = f"  agreement {row['agreement_vs_accurate']:.3f} (min {row['min_agreement_vs_accurate']:.3f})" if reference else ""
+        print(f"{row['mode']:<9} latency {row['mean_latency_s']:>7}s  accuracy {row['accuracy_vs_truth']:.3f}{agreement_text}  stages {row['stages_ms']}")
+    print(json.dumps(rows, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Tiled vs single-pass detection on large synthetic menus.
+
+Renders a wide multi-column "wall board" (small text on a large canvas),
+then runs detection + recognition with tiling off and on. Reports latency
+of each stage and how many of the rendered lines were recognized exactly.
+Requires the OCR models (runs in-process with the configured backend).
+
+Usage (from the vision/ directory):
+    python -m benchmarks.bench_tiling --columns 6 --text-height 20 --tile-size 960
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.instrumentation import tracing
+from app.core.models import model_manager
+from app.core.ocr import ocr_processor
+from app.core.pipeline import detect_regions
+from app.core.preprocessing import preprocess
+from app.core.tiling import tiled_detector
+from benchmarks.synthetic import encode_jpeg, random_lines, render_menu
+
+def render_board(columns: int, lines_per_column: int, column_width: int, text_height: int):
+    """Side-by-side menu columns; returns (image, all rendered lines)."""
+    pages, truth = [], []
+    for c in range(columns):
+        lines = random_lines(lines_per_column, seed=c)
+        truth.extend(lines)
+        pages.append(render_menu(lines, width=column_width, line_height=text_height))
+    height = max(page.shape[0] for page in pages)
+    pages = [np.pad(p, ((0, height - p.shape[0]), (0, 0), (0, 0)), constant_values=240) for p in pages]
+    return np.concatenate(pages, axis=1), truth
+
+def run(payload: bytes, truth, mode: str, repeats: int):
+    settings.TILING_MODE = mode
+    timings, stages = [], None
+    for _ in range(repeats):
+        with tracing() as trace:
+            start = time.perf_counter()
+            prepared = preprocess(payload)
+            image, regions = detect_regions(prepared, model_manager)
+            regions = ocr_processor.recognize(image, regions, model_manager)
+            timings.append(time.perf_counter() - start)
+        stages = trace.to_dict()
+
+    recognized = set(regions.texts)
+    found = sum(1 for line in truth if line in recognized)
+    return {
+        "tiling": mode,
+        "best_s": round(min(timings), 3),
+        "stages_ms": {name: round(seconds * 1000, 1) for name, seconds in stages["stages"].items()},
+        "regions": len(regions),
+        "tiles": stages["counts"].get("tiles", 1),
+        "lines_recognized": f"{found}/{len(truth)}",
+        "recall": round(found / len(truth), 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--columns", type=int, default=6)
+    parser.add_argument("--lines", type=int, default=40, help="Lines per column")
+    parser.add_argument("--column-width", type=int, default=1100)
+    parser.add_argument("--text-height", type=int, default=20)
+    parser.add_argument("--tile-size", type=int, default=settings.TILE_SIZE)
+    parser.add_argument("--overlap", type=int, default=settings.TILE_OVERLAP)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    tiled_detector.tile_size = args.tile_size
+    tiled_detector.overlap = args.overlap
+
+    board, truth = render_board(args.columns, args.lines, args.column_width, args.text_height)
+    payload = encode_jpeg(board)
+    print(f"Input: {board.shape[1]}x{board.shape[0]}, {len(truth)} lines, text ~{args.text_height}px")
+
+    model_manager.load_models()
+    tiled_detector.prepare(model_manager)
+    # Warm up both paths before timing
+    run(payload, truth, "off", 1)
+    run(payload, truth, "on", 1)
+
+    rows = [run(payload, truth, mode, args.repeats) for mode in ("off", "on")]
+    for row in rows:
+        print(f"tiling {row['tiling']:<3} {row['best_s']:>7.3f}s  tiles {row['tiles']:>3}  regions {row['regions']:>4}  "
+              f"recognized {row['lines_recognized']}  stages {row['stages_ms']}")
+    print(json.dumps(rows, indent=2))
+
+if __name__ == "__main__":
+    main()
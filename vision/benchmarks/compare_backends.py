@@ -0,0 +1,109 @@
+"""
+Accuracy/latency comparison of inference backends on fixed synthetic menus.
+
+Each backend configuration runs in its own process (so settings, memory and
+warm-up are isolated) over the same seeded menu images. Output items are
+compared with the first configuration (the reference) and with ground truth.
+
+Configurations are BACKEND[:INT8], e.g. "paddle", "onnx", "onnx:rec", "onnx:all".
+
+Usage (from the vision/ directory):
+    python -m benchmarks.compare_backends --configs paddle onnx onnx:rec --menus 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.synthetic import item_key
+
+def agreement(reference: list, candidate: list) -> float:
+    """Fraction of items (as section/name/price) shared by both lists."""
+    ref = {item_key(i) for i in reference}
+    cand = {item_key(i) for i in candidate}
+    if not ref and not cand:
+        return 1.0
+    return len(ref & cand) / max(len(ref), len(cand))
+
+def run_worker(menus: int, repeats: int):
+    from app.core.models import model_manager
+    from app.core.pipeline import run_pipeline
+    from benchmarks.synthetic import encode_jpeg, random_menu, render_menu
+
+    start = time.perf_counter()
+    model_manager.load_models()
+    load_s = time.perf_counter() - start
+
+    payloads = [encode_jpeg(render_menu(random_menu(seed)[0])) for seed in range(menus)]
+    run_pipeline(payloads[0], model_manager)  # warm-up
+
+    results = []
+    for payload in payloads:
+        timings = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            items = run_pipeline(payload, model_manager)
+            timings.append(time.perf_counter() - t0)
+        results.append({"best_s": min(timings), "items": items})
+
+    json.dump({"load_s": load_s, "results": results}, sys.stdout)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", nargs="+", default=["paddle", "onnx", "onnx:rec"])
+    parser.add_argument("--menus", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-agreement", type=float, default=0.95, help="Fail if any config agrees less with the reference")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.menus, args.repeats)
+        return
+
+    from benchmarks.synthetic import random_menu
+    truth = [random_menu(seed)[1] for seed in range(args.menus)]
+
+    runs = {}
+    for config in args.configs:
+        backend, _, int8 = config.partition(":")
+        env = {**os.environ, "INFERENCE_BACKEND": backend, "ONNX_INT8": int8 or "none"}
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.compare_backends", "--worker", "--menus", str(args.menus), "--repeats", str(args.repeats)],
+            env=env, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            print(f"{config}: failed\n{proc.stderr[-2000:]}")
+            continue
+        # Worker logs go to stdout too; the JSON report is the last line
+        runs[config] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    if not runs:
+        sys.exit(1)
+
+    reference_name = next(iter(runs))
+    reference = runs[reference_name]
+    rows = []
+    for config, run in runs.items():
+        per_menu = run["results"]
+        rows.append({
+            "config": config,
+            "load_s": round(run["load_s"], 2),
+            "mean_latency_s": round(sum(r["best_s"] for r in per_menu) / len(per_menu), 4),
+            "agreement_vs_reference": round(min(agreement(ref["items"], r["items"]) for ref, r in zip(reference["results"], per_menu)), 4),
+            "accuracy_vs_truth": round(sum(agreement(t, r["items"]) for t, r in zip(truth, per_menu)) / len(per_menu), 4),
+        })
+
+    print(f"reference: {reference_name}")
+    for row in rows:
+        print(f"{row['config']:<10} load {row['load_s']:>6}s  latency {row['mean_latency_s']:>7}s  "
+              f"agreement {row['agreement_vs_reference']:.3f}  accuracy {row['accuracy_vs_truth']:.3f}")
+    print(json.dumps(rows, indent=2))
+
+    if any(row["agreement_vs_reference"] < args.min_agreement for row in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
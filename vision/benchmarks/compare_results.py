@@ -0,0 +1,85 @@
+"""
+Compares two benchmark suite result files (benchmarks.suite --output).
+
+For every scenario present in both runs it prints the change in median
+stage latency, total latency, regions/sec, peak RSS and item F1, and exits
+non-zero if the candidate regresses beyond the given tolerances, so it can
+gate a commit in CI.
+
+Usage (from the vision/ directory):
+    python -m benchmarks.compare_results baseline.json candidate.json --max-slowdown 0.15
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.suite import STAGES
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+def compare(baseline: dict, candidate: dict, max_slowdown: float, max_f1_drop: float, max_rss_growth: float) -> list:
+    """Returns one row per shared scenario, with a list of regressions found."""
+    base = {row["name"]: row for row in baseline["scenarios"]}
+    rows = []
+    for row in candidate["scenarios"]:
+        before = base.get(row["name"])
+        if before is None:
+            continue
+        stages = {
+            name: _change(before["stages_ms"][name]["median"], row["stages_ms"][name]["median"])
+            for name in STAGES
+        }
+        total = _change(before["total_ms"]["median"], row["total_ms"]["median"])
+        rss = _change(before["peak_rss_mb"], row["peak_rss_mb"])
+        f1_delta = row["accuracy"]["f1"] - before["accuracy"]["f1"]
+
+        regressions = []
+        if total > max_slowdown:
+            regressions.append(f"total latency +{total:.0%}")
+        if f1_delta < -max_f1_drop:
+            regressions.append(f"f1 {f1_delta:+.3f}")
+        if rss > max_rss_growth:
+            regressions.append(f"peak RSS +{rss:.0%}")
+        rows.append({
+            "name": row["name"],
+            "stages": stages,
+            "total": total,
+            "regions_per_s": _change(before["regions_per_s"], row["regions_per_s"]),
+            "peak_rss": rss,
+            "f1_delta": f1_delta,
+            "regressions": regressions,
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--max-slowdown", type=float, default=0.10, help="Allowed relative increase of median total latency")
+    parser.add_argument("--max-f1-drop", type=float, default=0.01, help="Allowed absolute drop in item F1")
+    parser.add_argument("--max-rss-growth", type=float, default=0.15, help="Allowed relative increase of peak RSS")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline  {baseline['meta'].get('commit')}  {baseline['meta'].get('timestamp')}")
+    print(f"candidate {candidate['meta'].get('commit')}  {candidate['meta'].get('timestamp')}")
+    if baseline["meta"].get("settings") != candidate["meta"].get("settings"):
+        print(f"warning: settings differ: {baseline['meta'].get('settings')} vs {candidate['meta'].get('settings')}")
+
+    rows = compare(baseline, candidate, args.max_slowdown, args.max_f1_drop, args.max_rss_growth)
+    for row in rows:
+        stages = "  ".join(f"{name} {row['stages'][name]:+6.1%}" for name in STAGES)
+        status = "REGRESSION: " + ", ".join(row["regressions"]) if row["regressions"] else "ok"
+        print(f"{row['name']:<14} {stages}  total {row['total']:+6.1%}  regions/s {row['regions_per_s']:+6.1%}  "
+              f"rss {row['peak_rss']:+6.1%}  f1 {row['f1_delta']:+.3f}  {status}")
+
+    if any(row["regressions"] for row in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
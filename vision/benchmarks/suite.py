@@ -0,0 +1,221 @@
+"""
+Reproducible benchmark suite for the vision pipeline on synthetic menus.
+
+Renders a fixed set of scenarios (page size, text size and density, font,
+rotation, multi-column layouts) from seeded random menus with known
+ground-truth items, then runs each pipeline stage separately:
+
+    preprocess  preprocessing.preprocess (preprocess_image in "clahe" mode)
+    detect      pipeline.detect_regions with the EXTRACT_MODE tier's detector
+                (LayoutDetector.detect when PIPELINE_MODE=two_stage, the
+                shared engine's detector when fused)
+    recognize   OCRProcessor.recognize
+    merge       Merger.merge
+
+Per scenario it reports median/p90 latency per stage (plus the finer
+stages recorded by the trace), regions/sec through detection and
+recognition, peak RSS and item-level precision/recall/F1 against ground
+truth. Results are written as JSON; compare two runs with
+benchmarks.compare_results. Requires the OCR models (runs in-process with
+the configured backend and settings).
+
+Usage (from the vision/ directory):
+    python -m benchmarks.suite --output bench-results.json
+    python -m benchmarks.suite --scenarios baseline rotated_5 --pages 3 --repeats 5
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.detectors import get_tier
+from app.core.instrumentation import tracing
+from app.core.merger import merger
+from app.core.models import model_manager
+from app.core.ocr import ocr_processor
+from app.core.pipeline import detect_regions
+from app.core.preprocessing import preprocess
+from benchmarks.synthetic import Scenario, encode_jpeg, item_key, render_scenario
+
+SCENARIOS = [
+    Scenario("baseline"),
+    Scenario("small_text", line_height=20),
+    Scenario("large_page", column_width=3000, line_height=90),
+    Scenario("dense", spacing=1.25, sections=4, items_per_section=10),
+    Scenario("font_duplex", font="duplex"),
+    Scenario("font_triplex", font="triplex"),
+    Scenario("font_plain", font="plain"),
+    Scenario("rotated_2", rotation=2.0),
+    Scenario("rotated_5", rotation=-5.0),
+    Scenario("two_columns", columns=2, column_width=900),
+    Scenario("three_columns", columns=3, column_width=800, line_height=28),
+]
+
+STAGES = ("preprocess", "detect", "recognize", "merge")
+
+def item_scores(truth: List[dict], items: List[dict]) -> Dict[str, float]:
+    """Precision, recall and F1 of predicted items matched on section/name/price."""
+    expected = {item_key(i) for i in truth}
+    predicted = {item_key(i) for i in items}
+    matched = len(expected & predicted)
+    precision = matched / len(predicted) if predicted else 0.0
+    recall = matched / len(expected) if expected else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if matched else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+def reset_peak_rss() -> bool:
+    """Resets the kernel's RSS high-water mark for this process (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb() -> float:
+    """VmHWM (since the last reset) where available, else the lifetime ru_maxrss."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return maxrss / (1024.0 * 1024.0) if sys.platform == "darwin" else maxrss / 1024.0
+
+def run_once(payload: bytes) -> Dict[str, object]:
+    tier = get_tier()
+    timings: Dict[str, float] = {}
+    with tracing() as trace:
+        start = time.perf_counter()
+        prepared = preprocess(payload)
+        timings["preprocess"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        image, regions = detect_regions(prepared, model_manager, tier.detector)
+        timings["detect"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        regions = ocr_processor.recognize(image, regions, model_manager, cls=tier.classify)
+        timings["recognize"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        items = merger.merge(regions)
+        timings["merge"] = time.perf_counter() - start
+    return {"timings": timings, "trace": trace.to_dict()["stages"], "regions": len(regions), "items": items}
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    values = np.array(samples) * 1000
+    return {"median": round(float(np.median(values)), 2), "p90": round(float(np.percentile(values, 90)), 2)}
+
+def run_scenario(scenario: Scenario, pages: int, repeats: int) -> Dict[str, object]:
+    rendered = [render_scenario(scenario, seed) for seed in range(pages)]
+    payloads = [encode_jpeg(page) for page, _ in rendered]
+    # Untimed pass so model kernels for this input size are initialized
+    run_once(payloads[0])
+
+    rss_reset = reset_peak_rss()
+    stage_samples: Dict[str, List[float]] = {name: [] for name in STAGES}
+    trace_samples: Dict[str, List[float]] = {}
+    totals: List[float] = []
+    regions = 0
+    region_seconds = 0.0
+    scores = []
+    for payload, (_, truth) in zip(payloads, rendered):
+        for _ in range(repeats):
+            result = run_once(payload)
+            for name, seconds in result["timings"].items():
+                stage_samples[name].append(seconds)
+            for name, seconds in result["trace"].items():
+                trace_samples.setdefault(name, []).append(seconds)
+            totals.append(sum(result["timings"].values()))
+            regions += result["regions"]
+            region_seconds += result["timings"]["detect"] + result["timings"]["recognize"]
+        # Output is deterministic across repeats; score the last one
+        scores.append(item_scores(truth, result["items"]))
+
+    height, width = rendered[0][0].shape[:2]
+    return {
+        "name": scenario.name,
+        "scenario": scenario.__dict__,
+        "image": f"{width}x{height}",
+        "pages": pages,
+        "repeats": repeats,
+        "truth_items": sum(len(truth) for _, truth in rendered),
+        "stages_ms": {name: summarize(samples) for name, samples in stage_samples.items()},
+        "trace_stages_ms": {name: summarize(samples) for name, samples in sorted(trace_samples.items())},
+        "total_ms": summarize(totals),
+        "regions_per_page": round(regions / (pages * repeats), 1),
+        "regions_per_s": round(regions / region_seconds, 1) if region_seconds else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_rss_scope": "scenario" if rss_reset else "process",
+        "accuracy": {name: round(float(np.mean([s[name] for s in scores])), 4) for name in ("precision", "recall", "f1")},
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=[s.name for s in SCENARIOS], help="Default: all")
+    parser.add_argument("--pages", type=int, default=2, help="Seeded pages per scenario")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per page")
+    parser.add_argument("--output", help="Write the JSON results here (default: stdout only)")
+    args = parser.parse_args()
+
+    selected = [s for s in SCENARIOS if not args.scenarios or s.name in args.scenarios]
+
+    start = time.perf_counter()
+    model_manager.load_models()
+    load_s = time.perf_counter() - start
+
+    results = []
+    for scenario in selected:
+        row = run_scenario(scenario, args.pages, args.repeats)
+        results.append(row)
+        stages = "  ".join(f"{name} {row['stages_ms'][name]['median']:>8.1f}" for name in STAGES)
+        print(f"{row['name']:<14} {row['image']:>10}  {stages}  total {row['total_ms']['median']:>8.1f}ms  "
+              f"{row['regions_per_s']:>7.1f} regions/s  rss {row['peak_rss_mb']:>7.1f}MB  f1 {row['accuracy']['f1']:.3f}")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {
+                "INFERENCE_BACKEND": settings.INFERENCE_BACKEND,
+                "PIPELINE_MODE": settings.PIPELINE_MODE,
+                "PREPROCESS_MODE": settings.PREPROCESS_MODE,
+                "EXTRACT_MODE": settings.EXTRACT_MODE,
+                "OCR_BATCH_SIZE": settings.OCR_BATCH_SIZE,
+                "TILING_MODE": settings.TILING_MODE,
+            },
+            "load_s": round(load_s, 2),
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
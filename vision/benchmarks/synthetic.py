@@ -0,0 +1,141 @@
+import random
+import cv2
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+DISHES = [
+    "Caesar Salad", "Cheeseburger", "Margherita Pizza", "Grilled Salmon", "Chicken Wings",
+    "Beef Tacos", "Mushroom Risotto", "Fish and Chips", "Pad Thai", "Club Sandwich",
+    "Tomato Soup", "Lamb Curry", "Veggie Wrap", "Steak Frites", "Lemon Tart",
+]
+
+def render_text_line(text: str, height: int = 32, font: int = cv2.FONT_HERSHEY_SIMPLEX) -> np.ndarray:
+    """
+    Renders a single line of dark text on a light background, roughly `height` pixels tall.
+    """
+    scale = height / 30.0
+    thickness = max(1, int(round(scale * 1.5)))
+    (tw, th), baseline = cv2.getTextSize(text, font, scale, thickness)
+    pad = max(2, height // 6)
+    img = np.full((th + baseline + 2 * pad, tw + 2 * pad), 235, dtype=np.uint8)
+    cv2.putText(img, text, (pad, pad + th), font, scale, 20, thickness, cv2.LINE_AA)
+    return img
+
+def random_lines(count: int, seed: int = 0) -> List[str]:
+    """
+    Returns `count` menu-like text lines (dish names, prices, dish + price).
+    """
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        dish = rng.choice(DISHES)
+        price = f"{rng.randint(4, 40)}.{rng.choice(['00', '50', '95'])}"
+        lines.append(rng.choice([dish, price, f"{dish} {price}"]))
+    return lines
+
+def random_crops(count: int, seed: int = 0) -> List[np.ndarray]:
+    """
+    Renders `count` text line crops of varying height and length.
+    """
+    rng = random.Random(seed)
+    return [render_text_line(line, height=rng.randint(18, 48)) for line in random_lines(count, seed)]
+
+def render_menu(lines: List[str], width: int = 1200, line_height: int = 36, font: int = cv2.FONT_HERSHEY_SIMPLEX, spacing: float = 1.6) -> np.ndarray:
+    """
+    Renders menu lines top to bottom onto a single-column page, one line
+    every `spacing` line heights.
+    """
+    step = int(line_height * spacing)
+    height = (len(lines) + 2) * step
+    page = np.full((height, width, 3), 240, dtype=np.uint8)
+    scale = line_height / 30.0
+    thickness = max(1, int(round(scale * 1.5)))
+    y = step
+    for line in lines:
+        cv2.putText(page, line, (40, y), font, scale, (20, 20, 20), thickness, cv2.LINE_AA)
+        y += step
+    return page
+
+def encode_jpeg(image: np.ndarray, quality: int = 90) -> bytes:
+    ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Failed to encode synthetic image")
+    return buf.tobytes()
+
+SECTIONS = ["STARTERS", "MAINS", "DESSERTS", "DRINKS", "SIDES", "SALADS"]
+
+def random_menu(seed: int = 0, sections: int = 3, items_per_section: int = 5) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Returns (lines, ground_truth) for a sectioned menu. Each dish is rendered as
+    "Name price" on one line, so the expected MenuItem is known exactly.
+    """
+    rng = random.Random(seed)
+    lines: List[str] = []
+    truth: List[Dict[str, Any]] = []
+    for section in rng.sample(SECTIONS, k=min(sections, len(SECTIONS))):
+        lines.append(section)
+        for dish in rng.sample(DISHES, k=min(items_per_section, len(DISHES))):
+            price = float(f"{rng.randint(4, 40)}.{rng.choice(['00', '50', '95'])}")
+            lines.append(f"{dish} {price:.2f}")
+            truth.append({"section": section, "name": dish, "price": price})
+    return lines, truth
+
+def item_key(item: Dict[str, Any]) -> tuple:
+    """Identity of a menu item for matching: (section, lowercased name, price)."""
+    price = item.get("price")
+    return (item.get("section"), (item.get("name") or "").strip().lower(), round(price, 2) if price is not None else None)
+
+def rotate_page(page: np.ndarray, degrees: float) -> np.ndarray:
+    """Rotates a page about its centre, growing the canvas so nothing is cut off."""
+    if not degrees:
+        return page
+    h, w = page.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), degrees, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_w, new_h = int(h * sin + w * cos), int(h * cos + w * sin)
+    matrix[0, 2] += new_w / 2.0 - w / 2.0
+    matrix[1, 2] += new_h / 2.0 - h / 2.0
+    return cv2.warpAffine(page, matrix, (new_w, new_h), flags=cv2.INTER_LINEAR, borderValue=(240, 240, 240))
+
+FONTS = {
+    "simplex": cv2.FONT_HERSHEY_SIMPLEX,
+    "duplex": cv2.FONT_HERSHEY_DUPLEX,
+    "complex": cv2.FONT_HERSHEY_COMPLEX,
+    "triplex": cv2.FONT_HERSHEY_TRIPLEX,
+    "plain": cv2.FONT_HERSHEY_PLAIN,
+}
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    One synthetic menu layout. Each column is an independent sectioned menu
+    (random_menu); columns are placed side by side and the page is rotated
+    as a whole.
+    """
+    name: str
+    column_width: int = 1200
+    line_height: int = 36
+    spacing: float = 1.6
+    columns: int = 1
+    sections: int = 3
+    items_per_section: int = 5
+    font: str = "simplex"
+    rotation: float = 0.0
+
+def render_scenario(scenario: Scenario, seed: int = 0) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """Returns (page, ground-truth items) for `scenario`."""
+    pages, truth = [], []
+    for column in range(scenario.columns):
+        lines, items = random_menu(seed * 100 + column, scenario.sections, scenario.items_per_section)
+        truth.extend(items)
+        pages.append(render_menu(
+            lines,
+            width=scenario.column_width,
+            line_height=scenario.line_height,
+            font=FONTS[scenario.font],
+            spacing=scenario.spacing
+        ))
+    height = max(page.shape[0] for page in pages)
+    pages = [np.pad(p, ((0, height - p.shape[0]), (0, 0), (0, 0)), constant_values=240) for p in pages]
+    return rotate_page(np.concatenate(pages, axis=1), scenario.rotation), truth
@@ -0,0 +1,49 @@
+"""
+Exports the PaddleOCR det/rec/cls inference models used by the vision
+service to ONNX for INFERENCE_BACKEND=onnx.
+
+Requires paddle2onnx (pip install paddle2onnx). Models are downloaded by
+PaddleOCR on first use if they are not cached yet.
+
+Usage (from the vision/ directory):
+    python -m scripts.export_onnx --out /app/models/onnx
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+def export(model_dir: str, save_file: str, opset: int):
+    model_filename = "inference.pdmodel"
+    if not os.path.exists(os.path.join(model_dir, model_filename)):
+        model_filename = "model.pdmodel"
+    params_filename = model_filename.replace(".pdmodel", ".pdiparams")
+
+    subprocess.run([
+        sys.executable, "-m", "paddle2onnx.command",
+        "--model_dir", model_dir,
+        "--model_filename", model_filename,
+        "--params_filename", params_filename,
+        "--save_file", save_file,
+        "--opset_version", str(opset),
+        "--enable_onnx_checker", "True",
+    ], check=True)
+    print(f"Exported {model_dir} -> {save_file}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="/app/models/onnx")
+    parser.add_argument("--opset", type=int, default=11)
+    args = parser.parse_args()
+
+    from app.core.models import PaddleBackend
+
+    # The Paddle backend resolves (and downloads) the same models the service uses
+    engine = PaddleBackend().create_engine()
+    os.makedirs(args.out, exist_ok=True)
+    export(engine.args.det_model_dir, os.path.join(args.out, "det.onnx"), args.opset)
+    export(engine.args.rec_model_dir, os.path.join(args.out, "rec.onnx"), args.opset)
+    export(engine.args.cls_model_dir, os.path.join(args.out, "cls.onnx"), args.opset)
+
+if __name__ == "__main__":
+    main()